@@ -5,6 +5,7 @@ __version__ = "1.1.1"
 VERSION = f"v{__version__}"
 
 from .constants import (
+    Color,
     COLORS, 
     HANDLE_SIZE, 
     HandlePosition,
@@ -17,6 +18,8 @@ from .constants import (
 )
 from .styles import (
     STYLESHEET,
+    PALETTES,
+    build_stylesheet,
     BUTTON_STYLES,
     PANEL_STYLE,
     CANVAS_STYLE,
@@ -30,10 +33,13 @@ from .styles import (
 __all__ = [
     '__version__',
     'VERSION',
+    'Color',
     'COLORS', 
     'HANDLE_SIZE', 
     'HandlePosition', 
     'STYLESHEET',
+    'PALETTES',
+    'build_stylesheet',
     'DEFAULT_MODEL_PATH',
     'VALID_IMAGE_EXTENSIONS',
     'VALID_VIDEO_EXTENSIONS',
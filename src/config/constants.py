@@ -4,39 +4,47 @@ from enum import IntEnum
 
 
 # Professional dark theme color scheme
-COLORS = {
+class Color:
+    """Theme colors as class attributes (attribute loads, typo-safe)."""
+    
     # Primary palette
-    'primary': '#3c3c3c',
-    'secondary': '#3c3c3c',
-    'accent': '#007acc',
-    'accent_hover': '#1c97ea',
+    primary = '#3c3c3c'
+    secondary = '#3c3c3c'
+    accent = '#007acc'
+    accent_hover = '#1c97ea'
     
     # Semantic colors
-    'success': '#007acc',
-    'warning': '#007acc',
-    'danger': '#c42b1c',
-    'info': '#007acc',
+    success = '#007acc'
+    warning = '#007acc'
+    danger = '#c42b1c'
+    info = '#007acc'
     
     # Text colors
-    'text': '#cccccc',
-    'text_secondary': '#969696',
-    'text_muted': '#6e6e6e',
-    'text_dark': '#252526',
+    text = '#cccccc'
+    text_secondary = '#969696'
+    text_muted = '#6e6e6e'
+    text_dark = '#252526'
     
     # Background colors
-    'background': '#252526',
-    'surface': '#2d2d2d',
-    'surface_elevated': '#3c3c3c',
-    'panel': '#2d2d2d',
-    'canvas': '#1e1e1e',
+    background = '#252526'
+    surface = '#2d2d2d'
+    surface_elevated = '#3c3c3c'
+    panel = '#2d2d2d'
+    canvas = '#1e1e1e'
     
     # Border colors
-    'border': '#3c3c3c',
-    'border_light': '#3c3c3c',
-    'border_focus': '#007acc',
+    border = '#3c3c3c'
+    border_light = '#3c3c3c'
+    border_focus = '#007acc'
     
     # Special
-    'selection': 'rgba(0, 122, 204, 0.3)',
+    selection = 'rgba(0, 122, 204, 0.3)'
+
+
+# Backwards-compatible name -> color mapping
+COLORS = {
+    name: value for name, value in vars(Color).items()
+    if not name.startswith('_')
 }
 
 
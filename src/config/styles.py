@@ -1,262 +1,280 @@
 """Application stylesheet definitions - VS Code inspired theme."""
 
-from .constants import COLORS
+from functools import lru_cache
+from string import Template
 
+from .constants import Color, COLORS
 
-STYLESHEET = f"""
-    QMainWindow {{
-        background-color: {COLORS['background']};
-    }}
+
+_STYLESHEET_TEMPLATE = Template("""
+    QMainWindow {
+        background-color: $background;
+    }
     
-    QWidget {{
+    QWidget {
         font-family: 'Segoe UI', sans-serif;
         font-size: 11px;
-    }}
+    }
     
-    QGroupBox {{
+    QGroupBox {
         font-weight: 600;
         font-size: 10px;
-        color: {COLORS['text']};
-        background-color: {COLORS['surface']};
-        border: 1px solid {COLORS['border']};
+        color: $text;
+        background-color: $surface;
+        border: 1px solid $border;
         border-radius: 4px;
         margin-top: 8px;
         padding: 6px 4px 4px 4px;
-    }}
-    QGroupBox::title {{
+    }
+    QGroupBox::title {
         subcontrol-origin: margin;
         subcontrol-position: top left;
         left: 6px;
         top: 2px;
         padding: 0 3px;
-        color: {COLORS['text_secondary']};
-    }}
+        color: $text_secondary;
+    }
     
-    QPushButton {{
-        background-color: {COLORS['primary']};
-        color: {COLORS['text']};
-        border: 1px solid {COLORS['border']};
+    QPushButton {
+        background-color: $primary;
+        color: $text;
+        border: 1px solid $border;
         border-radius: 3px;
         padding: 4px 6px;
         font-size: 10px;
         min-height: 22px;
-    }}
-    QPushButton:hover {{
-        background-color: {COLORS['surface_elevated']};
-        border-color: {COLORS['accent']};
-    }}
-    QPushButton:pressed {{
-        background-color: {COLORS['accent']};
-    }}
-    QPushButton:checked {{
-        background-color: {COLORS['accent']};
+    }
+    QPushButton:hover {
+        background-color: $surface_elevated;
+        border-color: $accent;
+    }
+    QPushButton:pressed {
+        background-color: $accent;
+    }
+    QPushButton:checked {
+        background-color: $accent;
         color: white;
-    }}
-    QPushButton:disabled {{
-        background-color: {COLORS['surface']};
-        color: {COLORS['text_muted']};
-    }}
+    }
+    QPushButton:disabled {
+        background-color: $surface;
+        color: $text_muted;
+    }
     
-    QLabel {{
-        color: {COLORS['text']};
+    QLabel {
+        color: $text;
         font-size: 11px;
-    }}
+    }
     
-    QListWidget {{
-        background-color: {COLORS['surface']};
-        color: {COLORS['text']};
-        border: 1px solid {COLORS['border']};
+    QListWidget {
+        background-color: $surface;
+        color: $text;
+        border: 1px solid $border;
         border-radius: 3px;
         font-size: 10px;
         padding: 2px;
-    }}
-    QListWidget::item {{
+    }
+    QListWidget::item {
         padding: 4px 6px;
-    }}
-    QListWidget::item:selected {{
-        background-color: {COLORS['accent']};
+    }
+    QListWidget::item:selected {
+        background-color: $accent;
         color: white;
-    }}
-    QListWidget::item:hover:!selected {{
-        background-color: {COLORS['selection']};
-    }}
+    }
+    QListWidget::item:hover:!selected {
+        background-color: $selection;
+    }
     
-    QSpinBox {{
-        background-color: {COLORS['surface']};
-        color: {COLORS['text']};
-        border: 1px solid {COLORS['border']};
+    QSpinBox {
+        background-color: $surface;
+        color: $text;
+        border: 1px solid $border;
         border-radius: 3px;
         padding: 4px 6px;
         font-size: 11px;
-    }}
-    QSpinBox:focus {{
-        border-color: {COLORS['accent']};
-    }}
-    QSpinBox::up-button, QSpinBox::down-button {{
-        background-color: {COLORS['primary']};
+    }
+    QSpinBox:focus {
+        border-color: $accent;
+    }
+    QSpinBox::up-button, QSpinBox::down-button {
+        background-color: $primary;
         border: none;
         width: 16px;
-    }}
-    QSpinBox::up-button:hover, QSpinBox::down-button:hover {{
-        background-color: {COLORS['accent']};
-    }}
+    }
+    QSpinBox::up-button:hover, QSpinBox::down-button:hover {
+        background-color: $accent;
+    }
     
-    QComboBox {{
-        background-color: {COLORS['surface']};
-        color: {COLORS['text']};
-        border: 1px solid {COLORS['border']};
+    QComboBox {
+        background-color: $surface;
+        color: $text;
+        border: 1px solid $border;
         border-radius: 3px;
         padding: 4px 8px;
         font-size: 11px;
-    }}
-    QComboBox:focus {{
-        border-color: {COLORS['accent']};
-    }}
-    QComboBox::drop-down {{
+    }
+    QComboBox:focus {
+        border-color: $accent;
+    }
+    QComboBox::drop-down {
         border: none;
         width: 20px;
-        background-color: {COLORS['primary']};
-    }}
-    QComboBox QAbstractItemView {{
-        background-color: {COLORS['surface']};
-        color: {COLORS['text']};
-        border: 1px solid {COLORS['border']};
-        selection-background-color: {COLORS['accent']};
-    }}
+        background-color: $primary;
+    }
+    QComboBox QAbstractItemView {
+        background-color: $surface;
+        color: $text;
+        border: 1px solid $border;
+        selection-background-color: $accent;
+    }
     
-    QProgressBar {{
-        background-color: {COLORS['surface']};
-        border: 1px solid {COLORS['border']};
+    QProgressBar {
+        background-color: $surface;
+        border: 1px solid $border;
         border-radius: 3px;
         text-align: center;
-        color: {COLORS['text']};
+        color: $text;
         font-size: 10px;
         max-height: 16px;
-    }}
-    QProgressBar::chunk {{
-        background-color: {COLORS['accent']};
+    }
+    QProgressBar::chunk {
+        background-color: $accent;
         border-radius: 2px;
-    }}
+    }
     
-    QSlider::groove:horizontal {{
-        background: {COLORS['surface']};
+    QSlider::groove:horizontal {
+        background: $surface;
         height: 4px;
         border-radius: 2px;
-    }}
-    QSlider::handle:horizontal {{
-        background: {COLORS['accent']};
+    }
+    QSlider::handle:horizontal {
+        background: $accent;
         width: 12px;
         height: 12px;
         margin: -4px 0;
         border-radius: 6px;
-    }}
-    QSlider::sub-page:horizontal {{
-        background: {COLORS['accent']};
+    }
+    QSlider::sub-page:horizontal {
+        background: $accent;
         border-radius: 2px;
-    }}
+    }
     
-    QScrollBar:vertical {{
-        background-color: {COLORS['surface']};
+    QScrollBar:vertical {
+        background-color: $surface;
         width: 8px;
         border-radius: 4px;
-    }}
-    QScrollBar::handle:vertical {{
-        background-color: {COLORS['border']};
+    }
+    QScrollBar::handle:vertical {
+        background-color: $border;
         border-radius: 4px;
         min-height: 20px;
-    }}
-    QScrollBar::handle:vertical:hover {{
-        background-color: {COLORS['accent']};
-    }}
-    QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {{
+    }
+    QScrollBar::handle:vertical:hover {
+        background-color: $accent;
+    }
+    QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
         height: 0;
-    }}
-    QScrollBar::add-page:vertical, QScrollBar::sub-page:vertical {{
+    }
+    QScrollBar::add-page:vertical, QScrollBar::sub-page:vertical {
         background: none;
-    }}
+    }
     
-    QMessageBox {{
-        background-color: {COLORS['surface']};
-    }}
-    QMessageBox QLabel {{
-        color: {COLORS['text']};
-    }}
+    QMessageBox {
+        background-color: $surface;
+    }
+    QMessageBox QLabel {
+        color: $text;
+    }
     
-    QToolTip {{
-        background-color: {COLORS['surface_elevated']};
-        color: {COLORS['text']};
-        border: 1px solid {COLORS['border']};
+    QToolTip {
+        background-color: $surface_elevated;
+        color: $text;
+        border: 1px solid $border;
         padding: 4px;
         font-size: 10px;
-    }}
-"""
+    }
+""")
+
+
+# Named color palettes available for the stylesheet template
+PALETTES = {
+    'dark': COLORS,
+}
+
+
+@lru_cache(maxsize=None)
+def build_stylesheet(palette_key: str = 'dark') -> str:
+    """Render the application stylesheet for a palette, cached per palette."""
+    return _STYLESHEET_TEMPLATE.substitute(PALETTES[palette_key])
+
+
+STYLESHEET = build_stylesheet('dark')
 
 
 # Unified button style - all buttons same base style
 BUTTON_STYLES = {
     'primary': f"""
-        background-color: {COLORS['accent']};
+        background-color: {Color.accent};
         color: white;
         border: none;
     """,
     'success': f"""
-        background-color: {COLORS['accent']};
+        background-color: {Color.accent};
         color: white;
         border: none;
     """,
     'danger': f"""
-        background-color: {COLORS['danger']};
+        background-color: {Color.danger};
         color: white;
         border: none;
     """,
     'warning': f"""
-        background-color: {COLORS['primary']};
-        color: {COLORS['text']};
-        border: 1px solid {COLORS['border']};
+        background-color: {Color.primary};
+        color: {Color.text};
+        border: 1px solid {Color.border};
     """,
     'info': f"""
-        background-color: {COLORS['primary']};
-        color: {COLORS['text']};
-        border: 1px solid {COLORS['border']};
+        background-color: {Color.primary};
+        color: {Color.text};
+        border: 1px solid {Color.border};
     """,
 }
 
 
 PANEL_STYLE = f"""
-    background-color: {COLORS['surface']};
-    border: 1px solid {COLORS['border']};
+    background-color: {Color.surface};
+    border: 1px solid {Color.border};
     border-radius: 4px;
 """
 
 CANVAS_STYLE = f"""
-    background-color: {COLORS['canvas']};
-    border: 1px solid {COLORS['border']};
+    background-color: {Color.canvas};
+    border: 1px solid {Color.border};
     border-radius: 4px;
 """
 
 INFO_LABEL_STYLE = f"""
-    color: {COLORS['text_secondary']};
+    color: {Color.text_secondary};
     font-size: 10px;
     padding: 4px;
 """
 
 STATUS_SUCCESS_STYLE = f"""
-    color: {COLORS['accent']};
+    color: {Color.accent};
     font-size: 10px;
 """
 
 STATUS_ERROR_STYLE = f"""
-    color: {COLORS['danger']};
+    color: {Color.danger};
     font-size: 10px;
 """
 
 HINT_LABEL_STYLE = f"""
-    color: {COLORS['text_muted']};
+    color: {Color.text_muted};
     font-size: 9px;
 """
 
 TITLE_LABEL_STYLE = f"""
-    color: {COLORS['text']};
+    color: {Color.text};
     font-size: 12px;
     font-weight: 600;
 """
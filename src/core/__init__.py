@@ -1,7 +1,18 @@
 """Core modules for YOLO Refiner application."""
 
-from .model_manager import ModelManager
-from .annotation_manager import AnnotationManager
-from .state_manager import StateManager
-
 __all__ = ['ModelManager', 'AnnotationManager', 'StateManager']
+
+
+def __getattr__(name):
+    # Lazy submodule imports (PEP 562) so heavy inference dependencies are
+    # only loaded when a manager is actually requested.
+    if name == 'ModelManager':
+        from .model_manager import ModelManager
+        return ModelManager
+    if name == 'AnnotationManager':
+        from .annotation_manager import AnnotationManager
+        return AnnotationManager
+    if name == 'StateManager':
+        from .state_manager import StateManager
+        return StateManager
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,7 +1,7 @@
 """Annotation management for bounding boxes."""
 
-import copy
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
+from ..utils.geometry import BoxGeometry
 
 
 class AnnotationManager:
@@ -10,16 +10,26 @@ class AnnotationManager:
     def __init__(self):
         self.boxes: List[Dict] = []
         self.selected_index: int = -1
+        # Box indices ordered by x; None means it must be rebuilt
+        self._x_sorted_indices: Optional[List[int]] = []
+        # Bumped on every change so views can cache derived data
+        self.revision: int = 0
+        self._pixel_rects_key = None
+        self._pixel_rects: List = []
         
     def clear(self):
         """Clear all boxes."""
         self.boxes = []
         self.selected_index = -1
+        self._x_sorted_indices = []
+        self.revision += 1
     
     def set_boxes(self, boxes: List[Dict]):
         """Set the current boxes."""
         self.boxes = boxes
         self.selected_index = -1
+        self._x_sorted_indices = None
+        self.revision += 1
     
     def get_boxes(self) -> List[Dict]:
         """Get all boxes."""
@@ -36,7 +46,36 @@ class AnnotationManager:
             Index of added box
         """
         self.boxes.append(box)
-        return len(self.boxes) - 1
+        new_idx = len(self.boxes) - 1
+        self.revision += 1
+        
+        order = self._x_sorted_indices
+        if order is not None:
+            # Binary search for the insertion point (bisect.insort by key)
+            x = box['x']
+            lo, hi = 0, len(order)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self.boxes[order[mid]]['x'] <= x:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            order.insert(lo, new_idx)
+        
+        return new_idx
+    
+    def insert_box(self, index: int, box: Dict):
+        """
+        Insert a box at index (used to restore a deleted box).
+        
+        Args:
+            index: Position to insert at
+            box: Box dictionary
+        """
+        self.boxes.insert(index, box)
+        self.selected_index = -1
+        self._x_sorted_indices = None
+        self.revision += 1
     
     def delete_box(self, index: int) -> bool:
         """
@@ -51,6 +90,12 @@ class AnnotationManager:
         if 0 <= index < len(self.boxes):
             del self.boxes[index]
             self.selected_index = -1
+            self.revision += 1
+            if self._x_sorted_indices is not None:
+                self._x_sorted_indices = [
+                    i - 1 if i > index else i
+                    for i in self._x_sorted_indices if i != index
+                ]
             return True
         return False
     
@@ -67,9 +112,37 @@ class AnnotationManager:
         """
         if 0 <= index < len(self.boxes):
             self.boxes[index]['class'] = class_id
+            self.revision += 1
             return True
         return False
     
+    def mark_modified(self):
+        """Record that box geometry was edited in place (e.g. by dragging)."""
+        self.revision += 1
+    
+    def get_pixel_rects(self, orig_w: int, orig_h: int, scale_x: float, scale_y: float) -> List:
+        """
+        Get every box as a pixel QRect (None for boxes that cannot be drawn).
+        
+        The list is cached until the boxes or the scale change, so callers
+        must not mutate the rects (use QRect.translated()).
+        
+        Args:
+            orig_w, orig_h: Original image dimensions
+            scale_x, scale_y: Effective scale factors (including zoom)
+            
+        Returns:
+            List of QRect (or None) aligned with the box list
+        """
+        key = (orig_w, orig_h, scale_x, scale_y, self.revision)
+        if key != self._pixel_rects_key:
+            self._pixel_rects = [
+                BoxGeometry.get_box_rect_px(box, orig_w, orig_h, scale_x, scale_y)
+                for box in self.boxes
+            ]
+            self._pixel_rects_key = key
+        return self._pixel_rects
+    
     def get_selected_box(self) -> Optional[Dict]:
         """Get the currently selected box."""
         if 0 <= self.selected_index < len(self.boxes):
@@ -87,10 +160,32 @@ class AnnotationManager:
         """Deselect current box."""
         self.selected_index = -1
     
-    def sort_boxes_by_x(self):
-        """Sort boxes by x coordinate (left to right)."""
-        self.boxes = sorted(self.boxes, key=lambda b: b['x'])
+    def sort_boxes_by_x(self) -> List[int]:
+        """
+        Sort boxes by x coordinate (left to right).
+        
+        Returns:
+            Permutation applied, such that new[k] is old[perm[k]]
+        """
+        # The cached left-to-right order is exactly the sort permutation,
+        # so no comparison sort is needed when it is still valid
+        perm = list(self._get_x_order())
+        self.apply_permutation(perm)
+        self._x_sorted_indices = list(range(len(perm)))
+        return perm
+    
+    def apply_permutation(self, perm: List[int]):
+        """
+        Reorder boxes so that new[k] is old[perm[k]].
+        
+        Args:
+            perm: Permutation of box indices
+        """
+        boxes = self.boxes
+        self.boxes = [boxes[i] for i in perm]
         self.selected_index = -1
+        self._x_sorted_indices = None
+        self.revision += 1
     
     def get_sorted_indices(self) -> List[int]:
         """
@@ -99,14 +194,37 @@ class AnnotationManager:
         Returns:
             List of indices sorted left to right
         """
-        return sorted(range(len(self.boxes)), key=lambda i: self.boxes[i]['x'])
+        return list(self._get_x_order())
+    
+    def _get_x_order(self) -> List[int]:
+        """
+        Return the cached left-to-right index order, rebuilding it if boxes
+        were replaced or moved out of order (e.g. by dragging on the canvas).
+        """
+        order = self._x_sorted_indices
+        boxes = self.boxes
+        if order is not None and len(order) == len(boxes):
+            prev_x = None
+            for i in order:
+                x = boxes[i]['x']
+                if prev_x is not None and x < prev_x:
+                    break
+                prev_x = x
+            else:
+                return order
+        
+        xs = [b['x'] for b in boxes]
+        order = sorted(range(len(xs)), key=xs.__getitem__)
+        self._x_sorted_indices = order
+        return order
     
-    def get_plate_reading(self, class_names: Dict[int, str]) -> str:
+    def get_plate_reading(self, class_names: Union[Dict[int, str], List[str]]) -> str:
         """
         Get plate reading from sorted boxes.
         
         Args:
-            class_names: Dictionary mapping class ID to name
+            class_names: Dictionary mapping class ID to name, or a list
+                indexed by class ID
             
         Returns:
             String with concatenated class names
@@ -114,16 +232,25 @@ class AnnotationManager:
         if not self.boxes:
             return ""
         
-        sorted_boxes = sorted(self.boxes, key=lambda b: b['x'])
+        boxes = self.boxes
+        if isinstance(class_names, list):
+            n = len(class_names)
+            return " ".join(
+                class_names[c] if 0 <= c < n else f"Class {c}"
+                for c in (boxes[i]['class'] for i in self._get_x_order())
+            )
         return " ".join(
-            class_names.get(b['class'], f"Class {b['class']}") 
-            for b in sorted_boxes
+            class_names.get(boxes[i]['class'], f"Class {boxes[i]['class']}") 
+            for i in self._get_x_order()
         )
     
     def filter_by_confidence(self, raw_detections: List[Dict], threshold: float) -> List[Dict]:
         """
         Filter detections by confidence threshold.
         
+        Returned boxes are copies, so they can be edited without touching
+        the raw detections (which are re-filtered when the threshold moves).
+        
         Args:
             raw_detections: List of all detections
             threshold: Confidence threshold
@@ -133,5 +260,5 @@ class AnnotationManager:
         """
         return [
             b.copy() for b in raw_detections 
-            if b.get('conf', 1.0) >= threshold
+            if b['conf'] >= threshold
         ]
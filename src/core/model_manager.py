@@ -1,11 +1,46 @@
 """Model management for YOLO inference."""
 
 import os
-import cv2
-import numpy as np
+import re
+from functools import lru_cache
 from typing import Dict, List, Optional
 
 
+_CFG_SIZE_RE = re.compile(rb'^\s*(width|height)\s*=\s*(\d+)', re.MULTILINE)
+
+
+@lru_cache(maxsize=None)
+def _cuda_available() -> bool:
+    """Probe once whether OpenCV was built with a usable CUDA device."""
+    import cv2
+    
+    try:
+        return cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except Exception:
+        return False
+
+
+@lru_cache(maxsize=4)
+def _load_yolov4_blob(image_path: str, mtime: float, input_width: int, input_height: int):
+    """Read and preprocess an image for YOLOv4; cached per (path, mtime, size)."""
+    import cv2
+    
+    image = cv2.imread(image_path)
+    if image is None:
+        return None
+    
+    img_height, img_width = image.shape[:2]
+    
+    blob = cv2.dnn.blobFromImage(
+        image, 
+        1/255.0, 
+        (input_width, input_height),
+        swapRB=True, 
+        crop=False
+    )
+    return blob, img_width, img_height
+
+
 class ModelManager:
     
     def __init__(self):
@@ -20,6 +55,7 @@ class ModelManager:
         self.yolov4_class_names = {}
         self.yolov4_input_width = 416
         self.yolov4_input_height = 416
+        self._yolov4_output_layers = []
         
     def load_model(self, path: str) -> bool:
         try:
@@ -36,16 +72,21 @@ class ModelManager:
     
     def load_yolov4_model(self, cfg_path: str, weights_path: str, names_path: str) -> bool:
         try:
+            import cv2
+            
             self.yolov4_net = cv2.dnn.readNetFromDarknet(cfg_path, weights_path)
             self.yolov4_net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
             self.yolov4_net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
             
+            if _cuda_available():
+                self.yolov4_net.setPreferableBackend(cv2.dnn.DNN_BACKEND_CUDA)
+                self.yolov4_net.setPreferableTarget(cv2.dnn.DNN_TARGET_CUDA)
+            
+            layer_names = self.yolov4_net.getLayerNames()
             try:
-                if cv2.cuda.getCudaEnabledDeviceCount() > 0:
-                    self.yolov4_net.setPreferableBackend(cv2.dnn.DNN_BACKEND_CUDA)
-                    self.yolov4_net.setPreferableTarget(cv2.dnn.DNN_TARGET_CUDA)
+                self._yolov4_output_layers = [layer_names[i - 1] for i in self.yolov4_net.getUnconnectedOutLayers().flatten()]
             except:
-                pass
+                self._yolov4_output_layers = [layer_names[i[0] - 1] for i in self.yolov4_net.getUnconnectedOutLayers()]
             
             self.yolov4_class_names = self._load_names_file(names_path)
             self._parse_cfg_input_size(cfg_path)
@@ -75,18 +116,22 @@ class ModelManager:
         return class_names
     
     def _parse_cfg_input_size(self, cfg_path: str) -> None:
+        self.yolov4_input_width = 416
+        self.yolov4_input_height = 416
         try:
-            with open(cfg_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if line.startswith('width='):
-                        self.yolov4_input_width = int(line.split('=')[1])
-                    elif line.startswith('height='):
-                        self.yolov4_input_height = int(line.split('=')[1])
+            with open(cfg_path, 'rb') as f:
+                data = f.read()
+            
+            found = {}
+            for m in _CFG_SIZE_RE.finditer(data):
+                found.setdefault(m.group(1), int(m.group(2)))
+                if len(found) == 2:
+                    break
+            
+            self.yolov4_input_width = found.get(b'width', 416)
+            self.yolov4_input_height = found.get(b'height', 416)
         except Exception as e:
             print(f"Error parsing cfg file: {e}")
-            self.yolov4_input_width = 416
-            self.yolov4_input_height = 416
     
     def is_loaded(self) -> bool:
         return self.model is not None or self.yolov4_net is not None
@@ -117,107 +162,101 @@ class ModelManager:
         if not self.model:
             return []
         
-        results = self.model(image_path)
+        # Threshold is applied inside Ultralytics' NMS
+        results = self.model(image_path, conf=confidence, verbose=False)
         detections = []
         
         for r in results:
-            for box in r.boxes:
-                cls = int(box.cls[0])
-                x, y, w, h = box.xywhn[0].tolist()
-                conf = float(box.conf[0])
-                
-                if conf >= confidence:
-                    detections.append({
-                        'class': cls,
-                        'x': x,
-                        'y': y,
-                        'w': w,
-                        'h': h,
-                        'conf': conf
-                    })
+            detections.extend(self._ultralytics_result_to_detections(r))
         
         return detections
     
+    def _ultralytics_result_to_detections(self, r) -> List[Dict]:
+        boxes = r.boxes
+        if boxes is None or len(boxes) == 0:
+            return []
+        
+        # One device->host transfer per tensor instead of per box
+        xywhn = boxes.xywhn.cpu().numpy()
+        classes = boxes.cls.cpu().numpy().astype(int)
+        confs = boxes.conf.cpu().numpy()
+        
+        return [
+            {
+                'class': int(c),
+                'x': float(x),
+                'y': float(y),
+                'w': float(w),
+                'h': float(h),
+                'conf': float(cf)
+            }
+            for (x, y, w, h), c, cf in zip(xywhn, classes, confs)
+        ]
+    
     def _run_yolov4_inference(self, image_path: str, confidence: float) -> List[Dict]:
         if not self.yolov4_net:
             return []
         
         try:
-            image = cv2.imread(image_path)
-            if image is None:
-                return []
-            
-            img_height, img_width = image.shape[:2]
+            import cv2
+            import numpy as np
             
-            blob = cv2.dnn.blobFromImage(
-                image, 
-                1/255.0, 
-                (self.yolov4_input_width, self.yolov4_input_height),
-                swapRB=True, 
-                crop=False
+            cached = _load_yolov4_blob(
+                image_path,
+                os.path.getmtime(image_path),
+                self.yolov4_input_width,
+                self.yolov4_input_height
             )
+            if cached is None:
+                return []
+            
+            blob, img_width, img_height = cached
             
             self.yolov4_net.setInput(blob)
+            outputs = self.yolov4_net.forward(self._yolov4_output_layers)
             
-            layer_names = self.yolov4_net.getLayerNames()
-            try:
-                output_layers = [layer_names[i - 1] for i in self.yolov4_net.getUnconnectedOutLayers().flatten()]
-            except:
-                output_layers = [layer_names[i[0] - 1] for i in self.yolov4_net.getUnconnectedOutLayers()]
+            detections = []
             
-            outputs = self.yolov4_net.forward(output_layers)
+            all_det = np.concatenate([o.reshape(-1, o.shape[-1]) for o in outputs])
+            scores = all_det[:, 5:]
+            class_ids = scores.argmax(axis=1)
+            confidences = scores[np.arange(len(scores)), class_ids]
+            keep = confidences >= confidence
             
-            detections = []
-            boxes = []
-            confidences = []
-            class_ids = []
-            
-            for output in outputs:
-                for detection in output:
-                    scores = detection[5:]
-                    class_id = np.argmax(scores)
-                    conf = float(scores[class_id])
-                    
-                    if conf >= confidence:
-                        center_x = detection[0]
-                        center_y = detection[1]
-                        w = detection[2]
-                        h = detection[3]
-                        
-                        x_px = int((center_x - w/2) * img_width)
-                        y_px = int((center_y - h/2) * img_height)
-                        w_px = int(w * img_width)
-                        h_px = int(h * img_height)
-                        
-                        boxes.append([x_px, y_px, w_px, h_px])
-                        confidences.append(conf)
-                        class_ids.append(int(class_id))
+            all_det = all_det[keep]
+            class_ids = class_ids[keep].astype(np.int32)
+            confidences = confidences[keep].astype(np.float32)
+            
+            center_x, center_y = all_det[:, 0], all_det[:, 1]
+            w, h = all_det[:, 2], all_det[:, 3]
+            boxes = np.stack([
+                (center_x - w/2) * img_width,
+                (center_y - h/2) * img_height,
+                w * img_width,
+                h * img_height
+            ], axis=1).astype(np.int32)
             
             if len(boxes) > 0:
-                indices = cv2.dnn.NMSBoxes(boxes, confidences, confidence, 0.4)
+                indices = np.asarray(
+                    cv2.dnn.NMSBoxes(boxes, confidences, confidence, 0.4)
+                ).reshape(-1)
                 
-                if len(indices) > 0:
-                    if isinstance(indices, np.ndarray):
-                        indices = indices.flatten()
-                    else:
-                        indices = [i[0] if isinstance(i, (list, tuple, np.ndarray)) else i for i in indices]
+                for i in indices:
+                    x_px, y_px, w_px, h_px = boxes[i]
+                    
+                    cx = (x_px + w_px/2) / img_width
+                    cy = (y_px + h_px/2) / img_height
+                    nw = w_px / img_width
+                    nh = h_px / img_height
                     
-                    for i in indices:
-                        x_px, y_px, w_px, h_px = boxes[i]
-                        
-                        cx = (x_px + w_px/2) / img_width
-                        cy = (y_px + h_px/2) / img_height
-                        nw = w_px / img_width
-                        nh = h_px / img_height
-                        
-                        detections.append({
-                            'class': class_ids[i],
-                            'x': cx,
-                            'y': cy,
-                            'w': nw,
-                            'h': nh,
-                            'conf': confidences[i]
-                        })
+                    detections.append({
+                        'class': int(class_ids[i]),
+                        'x': float(cx),
+                        'y': float(cy),
+                        'w': float(nw),
+                        'h': float(nh),
+                        'conf': float(confidences[i])
+                    })
             
             return detections
             
@@ -1,64 +1,231 @@
 """State management for undo/redo operations."""
 
-import copy
-from collections import deque
-from typing import List, Dict, Optional
+from abc import ABC, abstractmethod
+from typing import List, Dict
 from ..config.constants import MAX_UNDO_STACK_SIZE
 
 
+class Change(ABC):
+    """
+    A reversible edit to the annotation manager's boxes.
+    
+    Only the data needed to revert the edit is stored, so recording a
+    change costs O(1) for single-box edits instead of a full copy.
+    """
+    
+    __slots__ = ()
+    
+    @abstractmethod
+    def undo(self, mgr):
+        """Revert the edit on the given AnnotationManager."""
+    
+    @abstractmethod
+    def redo(self, mgr):
+        """Re-apply the edit on the given AnnotationManager."""
+
+
+class UpdateClass(Change):
+    """Class id of one box changed from old to new."""
+    
+    __slots__ = ('index', 'old', 'new')
+    
+    def __init__(self, index: int, old: int, new: int):
+        self.index = index
+        self.old = old
+        self.new = new
+    
+    def undo(self, mgr):
+        mgr.update_box_class(self.index, self.old)
+    
+    def redo(self, mgr):
+        mgr.update_box_class(self.index, self.new)
+
+
+class InsertBox(Change):
+    """A box was inserted at index."""
+    
+    __slots__ = ('index', 'box')
+    
+    def __init__(self, index: int, box: Dict):
+        self.index = index
+        self.box = box
+    
+    def undo(self, mgr):
+        mgr.delete_box(self.index)
+    
+    def redo(self, mgr):
+        mgr.insert_box(self.index, self.box)
+
+
+class DeleteBox(InsertBox):
+    """A box was removed from index."""
+    
+    __slots__ = ()
+    
+    undo, redo = InsertBox.redo, InsertBox.undo
+
+
+class EditBox(Change):
+    """
+    Fields of one box were edited in place (e.g. by dragging).
+    
+    Holds the values the box does not currently have; undo and redo both
+    swap them with the live values.
+    """
+    
+    __slots__ = ('index', 'values')
+    
+    def __init__(self, index: int, values: Dict):
+        self.index = index
+        self.values = values
+    
+    def _swap(self, mgr):
+        box = mgr.boxes[self.index]
+        current = {k: box[k] for k in self.values}
+        box.update(self.values)
+        self.values = current
+        mgr.mark_modified()
+    
+    undo = redo = _swap
+
+
+class SortPerm(Change):
+    """Boxes were reordered so that new[k] is old[perm[k]]."""
+    
+    __slots__ = ('perm',)
+    
+    def __init__(self, perm: List[int]):
+        self.perm = perm
+    
+    def undo(self, mgr):
+        inverse = [0] * len(self.perm)
+        for k, i in enumerate(self.perm):
+            inverse[i] = k
+        mgr.apply_permutation(inverse)
+    
+    def redo(self, mgr):
+        mgr.apply_permutation(self.perm)
+
+
+class ReplaceBoxes(Change):
+    """
+    The whole box list was replaced (e.g. by re-filtering detections).
+    
+    Holds the list that is not currently live; undo and redo swap it with
+    the manager's list, so no boxes are copied.
+    """
+    
+    __slots__ = ('boxes',)
+    
+    def __init__(self, boxes: List[Dict]):
+        self.boxes = boxes
+    
+    def _swap(self, mgr):
+        current = mgr.boxes
+        mgr.set_boxes(self.boxes)
+        self.boxes = current
+    
+    undo = redo = _swap
+
+
+class _RingStack:
+    """Fixed-capacity LIFO stack over a preallocated ring of slots."""
+    
+    __slots__ = ('_buf', '_head', '_size')
+    
+    def __init__(self, capacity: int):
+        self._buf = [None] * capacity
+        self._head = 0
+        self._size = 0
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def append(self, item):
+        """Push an item, overwriting the oldest one when full."""
+        n = len(self._buf)
+        self._buf[self._head] = item
+        self._head = (self._head + 1) % n
+        if self._size < n:
+            self._size += 1
+    
+    def pop(self):
+        """Pop the most recently pushed item."""
+        if not self._size:
+            raise IndexError("pop from empty stack")
+        self._head = (self._head - 1) % len(self._buf)
+        item = self._buf[self._head]
+        self._buf[self._head] = None
+        self._size -= 1
+        return item
+    
+    def clear(self):
+        """Drop all items, keeping the slot storage."""
+        for i in range(len(self._buf)):
+            self._buf[i] = None
+        self._head = 0
+        self._size = 0
+
+
 class StateManager:
     """Manages undo/redo state for annotations."""
     
     def __init__(self):
-        self.undo_stack = deque(maxlen=MAX_UNDO_STACK_SIZE)
-        self.redo_stack = deque(maxlen=MAX_UNDO_STACK_SIZE)
+        self.undo_stack = _RingStack(MAX_UNDO_STACK_SIZE)
+        self.redo_stack = _RingStack(MAX_UNDO_STACK_SIZE)
     
     def clear(self):
         """Clear both undo and redo stacks."""
         self.undo_stack.clear()
         self.redo_stack.clear()
     
-    def save_state(self, boxes: List[Dict]):
+    def push(self, change: Change):
         """
-        Save current state to undo stack.
+        Record a change that has just been applied.
         
         Args:
-            boxes: Current list of boxes
+            change: Change describing how to revert the edit
         """
-        self.undo_stack.append(copy.deepcopy(boxes))
+        self.undo_stack.append(change)
         self.redo_stack.clear()
     
-    def undo(self, current_boxes: List[Dict]) -> Optional[List[Dict]]:
+    def undo(self, mgr) -> bool:
         """
-        Undo last operation.
+        Undo last change.
         
         Args:
-            current_boxes: Current list of boxes
+            mgr: AnnotationManager the change was applied to
             
         Returns:
-            Previous state or None if no undo available
+            True if a change was undone
         """
         if not self.undo_stack:
-            return None
+            return False
         
-        self.redo_stack.append(copy.deepcopy(current_boxes))
-        return self.undo_stack.pop()
+        change = self.undo_stack.pop()
+        change.undo(mgr)
+        mgr.deselect()
+        self.redo_stack.append(change)
+        return True
     
-    def redo(self, current_boxes: List[Dict]) -> Optional[List[Dict]]:
+    def redo(self, mgr) -> bool:
         """
-        Redo last undone operation.
+        Redo last undone change.
         
         Args:
-            current_boxes: Current list of boxes
+            mgr: AnnotationManager the change was applied to
             
         Returns:
-            Next state or None if no redo available
+            True if a change was redone
         """
         if not self.redo_stack:
-            return None
+            return False
         
-        self.undo_stack.append(copy.deepcopy(current_boxes))
-        return self.redo_stack.pop()
+        change = self.redo_stack.pop()
+        change.redo(mgr)
+        mgr.deselect()
+        self.undo_stack.append(change)
+        return True
     
     def can_undo(self) -> bool:
         """Check if undo is available."""
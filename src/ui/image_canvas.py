@@ -1,14 +1,66 @@
 """Interactive image canvas widget with zoom and pan."""
 
-import copy
+from itertools import product
+import numpy as np
 from PyQt5.QtWidgets import QLabel
-from PyQt5.QtCore import Qt, QPoint
-from ..config.constants import HANDLE_SIZE, HandlePosition, MIN_BOX_SIZE
+from PyQt5.QtCore import Qt, QPoint, QRect, QTimer
+from PyQt5.QtGui import QPixmapCache, QPainter, QPen, QColor, QFont
+from ..config.constants import Color, HANDLE_SIZE, HandlePosition, MIN_BOX_SIZE
 from ..utils.geometry import BoxGeometry
+from ..core.state_manager import EditBox
+
+
+# Which edges (left, right, top, bottom) each resize handle moves
+_HANDLE_MASK = {
+    HandlePosition.TOP_LEFT: (True, False, True, False),
+    HandlePosition.TOP_RIGHT: (False, True, True, False),
+    HandlePosition.BOTTOM_LEFT: (True, False, False, True),
+    HandlePosition.BOTTOM_RIGHT: (False, True, False, True),
+    HandlePosition.TOP: (False, False, True, False),
+    HandlePosition.BOTTOM: (False, False, False, True),
+    HandlePosition.LEFT: (True, False, False, False),
+    HandlePosition.RIGHT: (False, True, False, False),
+}
+_NO_EDGES = (False, False, False, False)
+
+
+def _corner_for(near_l, near_r, near_t, near_b):
+    if near_l and near_t:
+        return HandlePosition.TOP_LEFT
+    if near_r and near_t:
+        return HandlePosition.TOP_RIGHT
+    if near_l and near_b:
+        return HandlePosition.BOTTOM_LEFT
+    if near_r and near_b:
+        return HandlePosition.BOTTOM_RIGHT
+    return HandlePosition.NONE
+
+
+# Corner handle for every (near_left, near_right, near_top, near_bottom)
+# combination, honouring the TL > TR > BL > BR precedence
+_CORNER_TABLE = {
+    mask: _corner_for(*mask)
+    for mask in product((False, True), repeat=4)
+}
 
 
 class ImageCanvas(QLabel):
     
+    # Quiet time after a gesture before the smooth image is rendered
+    _SETTLE_MS = 150
+    
+    _CURSOR_MAP = {
+        HandlePosition.TOP_LEFT: Qt.SizeFDiagCursor,
+        HandlePosition.BOTTOM_RIGHT: Qt.SizeFDiagCursor,
+        HandlePosition.TOP_RIGHT: Qt.SizeBDiagCursor,
+        HandlePosition.BOTTOM_LEFT: Qt.SizeBDiagCursor,
+        HandlePosition.TOP: Qt.SizeVerCursor,
+        HandlePosition.BOTTOM: Qt.SizeVerCursor,
+        HandlePosition.LEFT: Qt.SizeHorCursor,
+        HandlePosition.RIGHT: Qt.SizeHorCursor,
+        HandlePosition.MOVE: Qt.SizeAllCursor,
+    }
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent_window = parent
@@ -22,6 +74,15 @@ class ImageCanvas(QLabel):
         self.drag_handle = HandlePosition.NONE
         self.drag_start = None
         self.drag_box_original = None
+        # Per-drag constants: normalized units per widget pixel and the
+        # original box edges (left, right, top, bottom)
+        self._drag_inv_sx = 0.0
+        self._drag_inv_sy = 0.0
+        self._drag_orig_edges = None
+        self._last_drag_result = None
+        self._last_drag_pixel_delta = None
+        # Undo snapshot is deferred until the drag actually changes the box
+        self._pending_save_state = False
         
         self.zoom_level = 1.0
         self.min_zoom = 0.5
@@ -31,92 +92,289 @@ class ImageCanvas(QLabel):
         self.panning = False
         self.pan_start = None
         self.pan_start_offset = None
+        
+        self._scaled_size_cache = None
+        
+        self._last_hover_pos = None
+        self._last_hover_box = -1
+        self._last_hover_handle = HandlePosition.NONE
+        self._current_cursor_shape = Qt.ArrowCursor
+        
+        # Rubber-band rectangle while drawing a new box or mask
+        self._temp_rect = None
+        self._temp_kind = None
+        
+        # (N, 4) int32 box edges (left, top, right, bottom) in zoomed pixels
+        self._px_edges = None
+        self._px_edges_key = None
+        
+        # Drag/pan redraws are coalesced to one per event-loop turn
+        self._draw_pending = False
+        self._pending_drag_pos = None
+        self._zoom_label_pending = False
+        self._draw_timer = QTimer(self)
+        self._draw_timer.setSingleShot(True)
+        self._draw_timer.setInterval(0)
+        self._draw_timer.timeout.connect(self._flush_draw)
+        
+        # Set during zoom/drag gestures to prefer fast image scaling
+        self._interactive = False
+        self._settle_timer = QTimer(self)
+        self._settle_timer.setSingleShot(True)
+        self._settle_timer.timeout.connect(self._on_settle)
     
     def reset_view(self):
         self.zoom_level = 1.0
         self.pan_offset_x = 0
         self.pan_offset_y = 0
+        self.invalidate_hover_cache()
         if self.parent_window:
             self.parent_window.draw_boxes()
     
     def get_handle_at(self, pos, box_idx):
-        if not self.parent_window or box_idx < 0:
+        pw = self.parent_window
+        if not pw or box_idx < 0:
             return HandlePosition.NONE
         
-        boxes = self.parent_window.annotation_mgr.get_boxes()
+        boxes = pw.annotation_mgr.get_boxes()
         if box_idx >= len(boxes):
             return HandlePosition.NONE
         
-        box = boxes[box_idx]
-        rect = BoxGeometry.get_box_rect_px(
-            box,
-            self.parent_window.original_pixmap.width() if self.parent_window.original_pixmap else 0,
-            self.parent_window.original_pixmap.height() if self.parent_window.original_pixmap else 0,
-            self.parent_window.scale_factor_x * self.zoom_level,
-            self.parent_window.scale_factor_y * self.zoom_level
-        )
-        
-        if not rect:
+        pm = pw.original_pixmap
+        if not pm or not pm.width() or not pm.height():
             return HandlePosition.NONE
         
-        from PyQt5.QtCore import Qt
-        base_scaled = self.parent_window.original_pixmap.scaled(
-            self.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation
-        )
-        zoomed_w = int(base_scaled.width() * self.zoom_level)
-        zoomed_h = int(base_scaled.height() * self.zoom_level)
-        zoomed_offset_x = (self.width() - zoomed_w) / 2
-        zoomed_offset_y = (self.height() - zoomed_h) / 2
+        zoom = self.zoom_level
+        l, t, r, b = self.get_px_edges()[box_idx].tolist()
         
-        adj_offset_x = zoomed_offset_x + self.pan_offset_x
-        adj_offset_y = zoomed_offset_y + self.pan_offset_y
+        base_w, base_h = self.get_base_size()
+        zoomed_offset_x = (self.width() - int(base_w * zoom)) / 2
+        zoomed_offset_y = (self.height() - int(base_h * zoom)) / 2
         
-        x = pos.x() - adj_offset_x
-        y = pos.y() - adj_offset_y
+        x = pos.x() - (zoomed_offset_x + self.pan_offset_x)
+        y = pos.y() - (zoomed_offset_y + self.pan_offset_y)
         
         hs = HANDLE_SIZE
         
-        if abs(x - rect.left()) <= hs and abs(y - rect.top()) <= hs:
-            return HandlePosition.TOP_LEFT
-        if abs(x - rect.right()) <= hs and abs(y - rect.top()) <= hs:
-            return HandlePosition.TOP_RIGHT
-        if abs(x - rect.left()) <= hs and abs(y - rect.bottom()) <= hs:
-            return HandlePosition.BOTTOM_LEFT
-        if abs(x - rect.right()) <= hs and abs(y - rect.bottom()) <= hs:
-            return HandlePosition.BOTTOM_RIGHT
-        
-        if rect.left() <= x <= rect.right() and abs(y - rect.top()) <= hs:
-            return HandlePosition.TOP
-        if rect.left() <= x <= rect.right() and abs(y - rect.bottom()) <= hs:
-            return HandlePosition.BOTTOM
-        if rect.top() <= y <= rect.bottom() and abs(x - rect.left()) <= hs:
-            return HandlePosition.LEFT
-        if rect.top() <= y <= rect.bottom() and abs(x - rect.right()) <= hs:
-            return HandlePosition.RIGHT
-        
-        if rect.contains(int(x), int(y)):
+        near_l = -hs <= x - l <= hs
+        near_r = -hs <= x - r <= hs
+        near_t = -hs <= y - t <= hs
+        near_b = -hs <= y - b <= hs
+        
+        corner = _CORNER_TABLE[(near_l, near_r, near_t, near_b)]
+        if corner != HandlePosition.NONE:
+            return corner
+        
+        if l <= x <= r:
+            if near_t:
+                return HandlePosition.TOP
+            if near_b:
+                return HandlePosition.BOTTOM
+        if t <= y <= b:
+            if near_l:
+                return HandlePosition.LEFT
+            if near_r:
+                return HandlePosition.RIGHT
+        
+        if l <= int(x) <= r and t <= int(y) <= b:
             return HandlePosition.MOVE
         
         return HandlePosition.NONE
     
+    def get_px_edges(self):
+        """
+        Pixel edges of every box at the current zoom, relative to the image.
+        
+        Rebuilt only when the pixmap, scale, zoom or annotation revision
+        changes; hover hit-tests just index into the cached array.
+        """
+        pw = self.parent_window
+        pm = pw.original_pixmap
+        zoom = self.zoom_level
+        key = (pm.cacheKey(), pw.scale_factor_x, pw.scale_factor_y, zoom,
+               pw.annotation_mgr.revision)
+        if self._px_edges_key != key:
+            orig_w, orig_h = pm.width(), pm.height()
+            sx = pw.scale_factor_x * zoom
+            sy = pw.scale_factor_y * zoom
+            edges = []
+            for box in pw.annotation_mgr.get_boxes():
+                rect = BoxGeometry.get_box_rect_px(box, orig_w, orig_h, sx, sy)
+                edges.append((rect.left(), rect.top(), rect.right(), rect.bottom()))
+            self._px_edges = np.array(edges, dtype=np.int32).reshape(-1, 4)
+            self._px_edges_key = key
+        return self._px_edges
+    
+    def find_box_containing(self, x, y):
+        """
+        Return the index of the topmost box under widget point (x, y), or -1.
+        
+        Tests every box at once against the cached pixel edges; the last
+        match wins, matching the drawing order.
+        """
+        pm = self.parent_window.original_pixmap
+        if not pm or not pm.width() or not pm.height():
+            return -1
+        
+        edges = self.get_px_edges()
+        if not len(edges):
+            return -1
+        
+        base_w, base_h = self.get_base_size()
+        zoom = self.zoom_level
+        zoomed_offset_x = (self.width() - int(base_w * zoom)) / 2
+        zoomed_offset_y = (self.height() - int(base_h * zoom)) / 2
+        px = int(x - (zoomed_offset_x + self.pan_offset_x))
+        py = int(y - (zoomed_offset_y + self.pan_offset_y))
+        
+        mask = ((edges[:, 0] <= px) & (px <= edges[:, 2])
+                & (edges[:, 1] <= py) & (py <= edges[:, 3]))
+        hits = np.flatnonzero(mask)
+        return int(hits[-1]) if hits.size else -1
+    
+    def get_base_size(self):
+        """
+        Size of the image fitted to the canvas (before zoom).
+        
+        Uses QSize math only, no pixel resampling, and is cached per canvas
+        size and pixmap.
+        """
+        pixmap = self.parent_window.original_pixmap
+        key = (self.width(), self.height(), pixmap.cacheKey())
+        if self._scaled_size_cache is None or self._scaled_size_cache[0] != key:
+            scaled_size = pixmap.size().scaled(self.size(), Qt.KeepAspectRatio)
+            self._scaled_size_cache = (key, (scaled_size.width(), scaled_size.height()))
+        return self._scaled_size_cache[1]
+    
+    def get_scaled_base(self):
+        """
+        The image resampled to the current canvas size and zoom level.
+        
+        Shared through QPixmapCache so repeated redraws at the same view
+        reuse one smooth-scaled pixmap instead of rescaling every time.
+        """
+        pixmap = self.parent_window.original_pixmap
+        key = f"base-{pixmap.cacheKey()}-{self.width()}x{self.height()}-{self.zoom_level:.3f}"
+        scaled = QPixmapCache.find(key)
+        if scaled is not None and not scaled.isNull():
+            return scaled
+        
+        # While the user is interacting, a nearest-neighbour preview is
+        # enough; the smooth version is built once the view settles.
+        mode = Qt.SmoothTransformation
+        if self._interactive:
+            key = "fast-" + key
+            mode = Qt.FastTransformation
+            scaled = QPixmapCache.find(key)
+            if scaled is not None and not scaled.isNull():
+                return scaled
+        
+        base_w, base_h = self.get_base_size()
+        scaled = pixmap.scaled(
+            int(base_w * self.zoom_level), int(base_h * self.zoom_level),
+            Qt.KeepAspectRatio, mode
+        )
+        QPixmapCache.insert(key, scaled)
+        return scaled
+    
+    def _begin_interaction(self):
+        self._interactive = True
+        self._settle_timer.start(self._SETTLE_MS)
+    
+    def _on_settle(self):
+        """Leave interactive mode and repaint with the smooth scaled image."""
+        if self.dragging or self.panning or self.drawing:
+            self._settle_timer.start(self._SETTLE_MS)
+            return
+        self._interactive = False
+        self.update()
+    
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        pw = self.parent_window
+        if pw and pw.original_pixmap and event.size() != event.oldSize():
+            # Fitted size changed: refresh the scale factors and overlays.
+            # The scaled base is re-fetched lazily under the new size key.
+            pw.display_image()
+            pw.draw_boxes()
+    
+    def set_temp_rect(self, start, end, kind):
+        """Show a rubber-band rectangle ('box' or 'mask') between two points."""
+        self._temp_rect = QRect(
+            int(min(start.x(), end.x())), int(min(start.y(), end.y())),
+            int(abs(end.x() - start.x())), int(abs(end.y() - start.y()))
+        )
+        self._temp_kind = kind
+        self.update()
+    
+    def clear_temp_rect(self):
+        """Drop the rubber-band rectangle; returns True if one was shown."""
+        shown = self._temp_rect is not None
+        self._temp_rect = None
+        self._temp_kind = None
+        return shown
+    
+    def paintEvent(self, event):
+        """
+        Blit the cached scaled image and paint the overlays on top.
+        
+        Overlays are drawn straight onto the widget, so a repaint no longer
+        copies a full canvas-sized pixmap through setPixmap.
+        """
+        pw = self.parent_window
+        if not pw or not pw.original_pixmap:
+            super().paintEvent(event)
+            return
+        
+        painter = QPainter(self)
+        painter.setClipRect(event.rect())
+        painter.fillRect(self.rect(), QColor(Color.canvas))
+        painter.setRenderHint(QPainter.Antialiasing)
+        
+        base_w, base_h = self.get_base_size()
+        zoom = self.zoom_level
+        adj_offset_x = (self.width() - int(base_w * zoom)) / 2 + self.pan_offset_x
+        adj_offset_y = (self.height() - int(base_h * zoom)) / 2 + self.pan_offset_y
+        painter.drawPixmap(int(adj_offset_x), int(adj_offset_y), self.get_scaled_base())
+        
+        temp_rect = self._temp_rect
+        pw.paint_annotations(painter, adj_offset_x, adj_offset_y, detailed=temp_rect is None)
+        
+        if temp_rect is not None:
+            if self._temp_kind == 'mask':
+                painter.fillRect(temp_rect, QColor(128, 128, 128, 240))
+                painter.setPen(QPen(QColor(200, 200, 200), 2, Qt.DashLine))
+                painter.drawRect(temp_rect)
+                painter.setPen(QColor(255, 255, 255))
+                painter.setFont(QFont("Consolas", 9, QFont.Bold))
+                painter.drawText(temp_rect.x() + 4, temp_rect.y() + 14, "MASK")
+            else:
+                painter.setPen(QPen(QColor(0, 180, 255), 2, Qt.DashLine))
+                painter.drawRect(temp_rect)
+                painter.setPen(QColor(0, 200, 255))
+                painter.setFont(QFont("Consolas", 9, QFont.Bold))
+                painter.drawText(
+                    temp_rect.x(), temp_rect.y() - 4,
+                    f"New: {pw.get_class_name(pw.default_class)}"
+                )
+        
+        painter.end()
+    
+    def set_cursor_shape(self, shape):
+        """Set the cursor shape, skipping the Qt call when it is unchanged."""
+        if shape != self._current_cursor_shape:
+            self.setCursor(shape)
+            self._current_cursor_shape = shape
+    
     def get_cursor_for_handle(self, handle):
-        cursor_map = {
-            HandlePosition.TOP_LEFT: Qt.SizeFDiagCursor,
-            HandlePosition.BOTTOM_RIGHT: Qt.SizeFDiagCursor,
-            HandlePosition.TOP_RIGHT: Qt.SizeBDiagCursor,
-            HandlePosition.BOTTOM_LEFT: Qt.SizeBDiagCursor,
-            HandlePosition.TOP: Qt.SizeVerCursor,
-            HandlePosition.BOTTOM: Qt.SizeVerCursor,
-            HandlePosition.LEFT: Qt.SizeHorCursor,
-            HandlePosition.RIGHT: Qt.SizeHorCursor,
-            HandlePosition.MOVE: Qt.SizeAllCursor,
-        }
-        return cursor_map.get(handle, Qt.ArrowCursor)
+        return self._CURSOR_MAP.get(handle, Qt.ArrowCursor)
     
     def wheelEvent(self, event):
         if not self.parent_window or not self.parent_window.original_pixmap:
             return
         
+        self.invalidate_hover_cache()
+        self._begin_interaction()
         old_zoom = self.zoom_level
         
         delta = event.angleDelta().y()
@@ -126,103 +384,145 @@ class ImageCanvas(QLabel):
             self.zoom_level = max(self.zoom_level / 1.15, self.min_zoom)
         
         if old_zoom != self.zoom_level:
-            self.parent_window.draw_boxes()
-            self.parent_window.update_zoom_label()
+            self._zoom_label_pending = True
+            self._schedule_draw()
     
     def mousePressEvent(self, event):
         if not self.parent_window:
             return
         
+        self.invalidate_hover_cache()
+        self._begin_interaction()
+        pos = event.localPos()
+        
         if event.button() == Qt.MiddleButton:
             self.panning = True
-            self.pan_start = event.pos()
+            self.pan_start = pos
             self.pan_start_offset = (self.pan_offset_x, self.pan_offset_y)
-            self.setCursor(Qt.ClosedHandCursor)
+            self.set_cursor_shape(Qt.ClosedHandCursor)
             return
         
         if event.button() == Qt.LeftButton:
             if self.parent_window.mask_mode:
                 self.drawing = True
-                self.start_point = event.pos()
-                self.end_point = event.pos()
+                self.start_point = pos
+                self.end_point = pos
             elif self.parent_window.draw_mode:
                 self.drawing = True
-                self.start_point = event.pos()
-                self.end_point = event.pos()
+                self.start_point = pos
+                self.end_point = pos
             else:
-                selected_idx = self.parent_window.annotation_mgr.selected_index
-                if selected_idx >= 0:
-                    handle = self.get_handle_at(event.pos(), selected_idx)
-                    if handle != HandlePosition.NONE:
-                        self.dragging = True
-                        self.drag_handle = handle
-                        self.drag_start = event.pos()
-                        boxes = self.parent_window.annotation_mgr.get_boxes()
-                        self.drag_box_original = copy.deepcopy(boxes[selected_idx])
-                        self.parent_window.state_mgr.save_state(boxes)
-                        return
-                
-                self.parent_window.select_box_at(event.pos().x(), event.pos().y())
-                
-                selected_idx = self.parent_window.annotation_mgr.selected_index
-                if selected_idx >= 0:
-                    handle = self.get_handle_at(event.pos(), selected_idx)
-                    if handle != HandlePosition.NONE:
-                        self.dragging = True
-                        self.drag_handle = handle
-                        self.drag_start = event.pos()
-                        boxes = self.parent_window.annotation_mgr.get_boxes()
-                        self.drag_box_original = copy.deepcopy(boxes[selected_idx])
-                        self.parent_window.state_mgr.save_state(boxes)
+                boxes = self.parent_window.annotation_mgr.get_boxes()
+                if self._try_begin_drag(pos, boxes):
+                    return
+                self.parent_window.select_box_at(pos.x(), pos.y())
+                self._try_begin_drag(pos, boxes)
+    
+    def _try_begin_drag(self, pos, boxes):
+        """Start dragging the selected box if pos is on one of its handles."""
+        selected_idx = self.parent_window.annotation_mgr.selected_index
+        if selected_idx < 0:
+            return False
+        
+        handle = self.get_handle_at(pos, selected_idx)
+        if handle == HandlePosition.NONE:
+            return False
+        
+        self.dragging = True
+        self.drag_handle = handle
+        self.drag_start = pos
+        self.drag_box_original = boxes[selected_idx].copy()
+        self._prepare_drag_geometry()
+        self._pending_save_state = True
+        return True
     
     def mouseMoveEvent(self, event):
-        if not self.parent_window:
+        pw = self.parent_window
+        if not pw:
             return
         
+        pos = event.localPos()
+        
         if self.panning:
-            dx = event.pos().x() - self.pan_start.x()
-            dy = event.pos().y() - self.pan_start.y()
-            self.pan_offset_x = self.pan_start_offset[0] + dx
-            self.pan_offset_y = self.pan_start_offset[1] + dy
-            self.parent_window.draw_boxes()
+            self.pan_offset_x = self.pan_start_offset[0] + pos.x() - self.pan_start.x()
+            self.pan_offset_y = self.pan_start_offset[1] + pos.y() - self.pan_start.y()
+            self._schedule_draw()
             return
         
-        if self.parent_window.mask_mode:
+        if pw.mask_mode:
             if self.drawing:
-                self.end_point = event.pos()
-                self.parent_window.draw_temp_mask(self.start_point, self.end_point)
+                self.end_point = pos
+                pw.draw_temp_mask(self.start_point, pos)
             else:
-                self.setCursor(Qt.CrossCursor)
-        elif self.parent_window.draw_mode:
+                self.set_cursor_shape(Qt.CrossCursor)
+        elif pw.draw_mode:
             if self.drawing:
-                self.end_point = event.pos()
-                self.parent_window.draw_temp_box(self.start_point, self.end_point)
+                self.end_point = pos
+                pw.draw_temp_box(self.start_point, pos)
             else:
-                self.setCursor(Qt.CrossCursor)
+                self.set_cursor_shape(Qt.CrossCursor)
         elif self.dragging and self.drag_handle != HandlePosition.NONE:
-            self.update_box_from_drag(event.pos())
+            self._pending_drag_pos = pos
+            self._schedule_draw()
         else:
-            selected_idx = self.parent_window.annotation_mgr.selected_index
+            selected_idx = pw.annotation_mgr.selected_index
             if selected_idx >= 0:
-                handle = self.get_handle_at(event.pos(), selected_idx)
-                self.setCursor(self.get_cursor_for_handle(handle))
+                last = self._last_hover_pos
+                if (last is not None and selected_idx == self._last_hover_box
+                        and abs(pos.x() - last.x()) + abs(pos.y() - last.y()) < HANDLE_SIZE // 2):
+                    handle = self._last_hover_handle
+                else:
+                    handle = self.get_handle_at(pos, selected_idx)
+                    self._last_hover_pos = pos
+                    self._last_hover_box = selected_idx
+                    self._last_hover_handle = handle
+                self.set_cursor_shape(self.get_cursor_for_handle(handle))
             else:
-                self.setCursor(Qt.ArrowCursor)
+                self._last_hover_pos = None
+                self.set_cursor_shape(Qt.ArrowCursor)
+    
+    def _schedule_draw(self):
+        """Request a redraw on the next event-loop turn, once per batch of events."""
+        if not self._draw_pending:
+            self._draw_pending = True
+            self._draw_timer.start()
+    
+    def _flush_draw(self):
+        """Apply the latest queued drag position or zoom and redraw once."""
+        self._draw_pending = False
+        self._draw_timer.stop()
+        pos = self._pending_drag_pos
+        self._pending_drag_pos = None
+        if pos is not None and self.dragging:
+            self.update_box_from_drag(pos)
+        elif self.parent_window:
+            self.parent_window.draw_boxes()
+        if self._zoom_label_pending and self.parent_window:
+            self._zoom_label_pending = False
+            self.parent_window.update_zoom_label()
+    
+    def invalidate_hover_cache(self):
+        """Forget the cached hover hit-test (call when boxes or view change)."""
+        self._last_hover_pos = None
     
     def mouseReleaseEvent(self, event):
         if not self.parent_window:
             return
         
+        self._settle_timer.start(0)
+        
         if event.button() == Qt.MiddleButton:
             self.panning = False
             self.pan_start = None
             self.pan_start_offset = None
-            self.setCursor(Qt.ArrowCursor)
+            self.set_cursor_shape(Qt.ArrowCursor)
             return
         
         if event.button() == Qt.LeftButton:
             if self.drawing:
                 self.drawing = False
+                self.clear_temp_rect()
+                self.update()
                 if self.parent_window.mask_mode and self.start_point and self.end_point:
                     self.parent_window.finalize_new_mask(self.start_point, self.end_point)
                 elif self.parent_window.draw_mode and self.start_point and self.end_point:
@@ -230,72 +530,80 @@ class ImageCanvas(QLabel):
                 self.start_point = None
                 self.end_point = None
             elif self.dragging:
+                if self._draw_pending:
+                    self._flush_draw()
                 self.dragging = False
                 self.drag_handle = HandlePosition.NONE
                 self.drag_start = None
                 self.drag_box_original = None
+                self._drag_orig_edges = None
+                self._pending_save_state = False
                 self.parent_window.update_list_widget()
     
+    def _prepare_drag_geometry(self):
+        """Precompute the per-drag scale factors and original box edges."""
+        pw = self.parent_window
+        pixmap = pw.original_pixmap
+        orig = self.drag_box_original
+        self._drag_inv_sx = 1.0 / (pw.scale_factor_x * self.zoom_level * pixmap.width())
+        self._drag_inv_sy = 1.0 / (pw.scale_factor_y * self.zoom_level * pixmap.height())
+        half_w = orig['w'] / 2
+        half_h = orig['h'] / 2
+        self._last_drag_result = None
+        self._last_drag_pixel_delta = None
+        self._drag_orig_edges = (
+            orig['x'] - half_w, orig['x'] + half_w,
+            orig['y'] - half_h, orig['y'] + half_h,
+        )
+    
     def update_box_from_drag(self, current_pos):
-        if not self.parent_window or not self.drag_box_original:
+        pw = self.parent_window
+        if not pw or not self._drag_orig_edges:
             return
         
-        selected_idx = self.parent_window.annotation_mgr.selected_index
+        annotation_mgr = pw.annotation_mgr
+        selected_idx = annotation_mgr.selected_index
         if selected_idx < 0:
             return
         
-        if not self.parent_window.original_pixmap:
+        drag_start = self.drag_start
+        pixel_delta = (current_pos.x() - drag_start.x(), current_pos.y() - drag_start.y())
+        if pixel_delta == self._last_drag_pixel_delta:
             return
+        self._last_drag_pixel_delta = pixel_delta
         
-        orig_w = self.parent_window.original_pixmap.width()
-        orig_h = self.parent_window.original_pixmap.height()
+        dx = pixel_delta[0] * self._drag_inv_sx
+        dy = pixel_delta[1] * self._drag_inv_sy
         
-        dx = (current_pos.x() - self.drag_start.x()) / (self.parent_window.scale_factor_x * self.zoom_level) / orig_w
-        dy = (current_pos.y() - self.drag_start.y()) / (self.parent_window.scale_factor_y * self.zoom_level) / orig_h
+        box = annotation_mgr.get_boxes()[selected_idx]
+        orig_left, orig_right, orig_top, orig_bottom = self._drag_orig_edges
+        handle = self.drag_handle
         
-        boxes = self.parent_window.annotation_mgr.get_boxes()
-        box = boxes[selected_idx]
-        orig = self.drag_box_original
-        
-        orig_left = orig['x'] - orig['w'] / 2
-        orig_right = orig['x'] + orig['w'] / 2
-        orig_top = orig['y'] - orig['h'] / 2
-        orig_bottom = orig['y'] + orig['h'] / 2
-        
-        new_left, new_right = orig_left, orig_right
-        new_top, new_bottom = orig_top, orig_bottom
-        
-        if self.drag_handle == HandlePosition.MOVE:
+        if handle == HandlePosition.MOVE:
             new_left = orig_left + dx
             new_right = orig_right + dx
             new_top = orig_top + dy
             new_bottom = orig_bottom + dy
-        elif self.drag_handle == HandlePosition.TOP_LEFT:
-            new_left = min(orig_left + dx, orig_right - MIN_BOX_SIZE)
-            new_top = min(orig_top + dy, orig_bottom - MIN_BOX_SIZE)
-        elif self.drag_handle == HandlePosition.TOP_RIGHT:
-            new_right = max(orig_right + dx, orig_left + MIN_BOX_SIZE)
-            new_top = min(orig_top + dy, orig_bottom - MIN_BOX_SIZE)
-        elif self.drag_handle == HandlePosition.BOTTOM_LEFT:
-            new_left = min(orig_left + dx, orig_right - MIN_BOX_SIZE)
-            new_bottom = max(orig_bottom + dy, orig_top + MIN_BOX_SIZE)
-        elif self.drag_handle == HandlePosition.BOTTOM_RIGHT:
-            new_right = max(orig_right + dx, orig_left + MIN_BOX_SIZE)
-            new_bottom = max(orig_bottom + dy, orig_top + MIN_BOX_SIZE)
-        elif self.drag_handle == HandlePosition.TOP:
-            new_top = min(orig_top + dy, orig_bottom - MIN_BOX_SIZE)
-        elif self.drag_handle == HandlePosition.BOTTOM:
-            new_bottom = max(orig_bottom + dy, orig_top + MIN_BOX_SIZE)
-        elif self.drag_handle == HandlePosition.LEFT:
-            new_left = min(orig_left + dx, orig_right - MIN_BOX_SIZE)
-        elif self.drag_handle == HandlePosition.RIGHT:
-            new_right = max(orig_right + dx, orig_left + MIN_BOX_SIZE)
+        else:
+            ml, mr, mt, mb = _HANDLE_MASK.get(handle, _NO_EDGES)
+            new_left = min(orig_left + dx, orig_right - MIN_BOX_SIZE) if ml else orig_left
+            new_right = max(orig_right + dx, orig_left + MIN_BOX_SIZE) if mr else orig_right
+            new_top = min(orig_top + dy, orig_bottom - MIN_BOX_SIZE) if mt else orig_top
+            new_bottom = max(orig_bottom + dy, orig_top + MIN_BOX_SIZE) if mb else orig_bottom
         
         new_left, new_right, new_top, new_bottom = BoxGeometry.clamp_box_to_bounds(
             new_left, new_right, new_top, new_bottom
         )
         
         result = BoxGeometry.edges_to_center_format(new_left, new_right, new_top, new_bottom)
+        if result == self._last_drag_result:
+            return
+        self._last_drag_result = result
+        if self._pending_save_state:
+            orig = self.drag_box_original
+            pw.state_mgr.push(EditBox(selected_idx, {k: orig[k] for k in ('x', 'y', 'w', 'h')}))
+            self._pending_save_state = False
         box.update(result)
+        annotation_mgr.mark_modified()
         
-        self.parent_window.draw_boxes()
+        pw.draw_boxes()
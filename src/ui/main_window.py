@@ -1,22 +1,30 @@
 """Main window for the Label Mender application."""
 
 import os
-import cv2
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from itertools import chain
+import numpy as np
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QPushButton, QLabel, QFileDialog, QListWidget, 
                              QSpinBox, QMessageBox, QSlider, QComboBox, 
                              QProgressBar, QGroupBox, QInputDialog, QApplication,
                              QSizePolicy, QTabWidget, QScrollArea, QFrame, QDialog,
-                             QFormLayout, QDialogButtonBox)
-from PyQt5.QtGui import QPixmap, QPainter, QPen, QColor, QFont, QBrush, QIcon
-from PyQt5.QtCore import Qt, QRect
+                             QFormLayout, QDialogButtonBox, QStyledItemDelegate,
+                             QStyleOptionViewItem)
+from PyQt5.QtGui import QPixmap, QPixmapCache, QPen, QColor, QFont, QBrush, QIcon
+from PyQt5.QtCore import Qt, QRect, QTimer, QThreadPool
 
-from ..config import COLORS, STYLESHEET, DEFAULT_MODEL_PATH, VALID_IMAGE_EXTENSIONS, VALID_VIDEO_EXTENSIONS, DEFAULT_CONFIDENCE, HANDLE_SIZE, VERSION
+from ..config import Color, COLORS, STYLESHEET, DEFAULT_MODEL_PATH, VALID_IMAGE_EXTENSIONS, VALID_VIDEO_EXTENSIONS, DEFAULT_CONFIDENCE, HANDLE_SIZE, VERSION
 from ..config.styles import (PANEL_STYLE, CANVAS_STYLE, INFO_LABEL_STYLE, 
                              STATUS_SUCCESS_STYLE, STATUS_ERROR_STYLE, HINT_LABEL_STYLE)
 from ..core import ModelManager, AnnotationManager, StateManager
+from ..core.state_manager import UpdateClass, InsertBox, DeleteBox, SortPerm, ReplaceBoxes
 from ..utils import BoxGeometry, FileManager
 from .image_canvas import ImageCanvas
+from .workers import InferenceTask, PrefetchTask, SaveSignals, SaveTask
 
 
 class VideoFrameDialog(QDialog):
@@ -72,6 +80,8 @@ class VideoFrameDialog(QDialog):
         layout.setSpacing(12)
         layout.setContentsMargins(16, 16, 16, 16)
         
+        import cv2
+        
         cap = cv2.VideoCapture(self.video_path, cv2.CAP_ANY)
         if cap.isOpened():
             self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
@@ -216,8 +226,64 @@ class VideoFrameDialog(QDialog):
         return self.output_folder, self.spin_interval.value(), self.spin_max_frames.value()
 
 
+class ClassShareDelegate(QStyledItemDelegate):
+    """
+    Draws a class statistics row as its text plus a filled share bar.
+    
+    The share (0-1) is read from the item's Qt.UserRole data; the bar is a
+    pair of fillRects instead of a string of block glyphs.
+    """
+    
+    BAR_WIDTH = 50
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._track = QColor(Color.border)
+        self._fill = QColor(Color.accent)
+    
+    def paint(self, painter, option, index):
+        share = index.data(Qt.UserRole)
+        if share is None:
+            super().paint(painter, option, index)
+            return
+        
+        rect = option.rect
+        bar_w = min(self.BAR_WIDTH, rect.width() // 3)
+        text_option = QStyleOptionViewItem(option)
+        text_option.rect = rect.adjusted(0, 0, -(bar_w + 8), 0)
+        super().paint(painter, text_option, index)
+        
+        bar = QRect(rect.right() - bar_w - 3, rect.top() + 3, bar_w, max(rect.height() - 6, 2))
+        painter.fillRect(bar, self._track)
+        filled = int(bar_w * share)
+        if filled > 0:
+            painter.fillRect(QRect(bar.left(), bar.top(), filled, bar.height()), self._fill)
+
+
+# (icon path, logo size) -> (window icon, scaled header logo), shared by
+# every window so the smooth scale runs once per process
+_ICON_CACHE = {}
+
+
+def _load_icon(path, logo_size):
+    cached = _ICON_CACHE.get((path, logo_size))
+    if cached is None:
+        pixmap = QPixmap(path)
+        cached = (
+            QIcon(pixmap),
+            pixmap.scaled(logo_size, logo_size, Qt.KeepAspectRatio, Qt.SmoothTransformation),
+        )
+        _ICON_CACHE[(path, logo_size)] = cached
+    return cached
+
+
 class MainWindow(QMainWindow):
     
+    # Window in which a second X press confirms deleting the image
+    _DELETE_CONFIRM_SECS = 0.8
+    # Decoded full-resolution frames kept: the current image and its neighbours
+    _DECODED_CACHE_SIZE = 3
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle(f"Label Mender {VERSION}")
@@ -226,9 +292,12 @@ class MainWindow(QMainWindow):
         
         icon_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'icon', 'icon.png')
         if os.path.exists(icon_path):
-            self.setWindowIcon(QIcon(icon_path))
+            self._icon, self._logo_pm = _load_icon(icon_path, 36)
+            self.setWindowIcon(self._icon)
             self.icon_path = icon_path
         else:
+            self._icon = None
+            self._logo_pm = None
             self.icon_path = None
         
         self.model_mgr = ModelManager()
@@ -238,8 +307,23 @@ class MainWindow(QMainWindow):
         
         self.image_folder = ""
         self.image_list = []
+        # Per image_list entry: filename without extension and .txt path,
+        # kept in lockstep with image_list (see _index_image_list)
+        self._image_stems = []
+        self._txt_paths = []
+        # Stems of .txt files in image_folder, kept in sync on save/delete;
+        # None means the folder must be rescanned
+        self._annotated = None
+        # txt_path -> contents last written by save_annotation
+        self._saved_payloads = {}
+        # txt_path -> ((mtime_ns, size), box count, Counter of class ids)
+        self._stats_cache = {}
         self.current_index = 0
         self.current_image_path = ""
+        # Derived from current_image_path once per load_image
+        self._current_basename = ""
+        self._current_stem = ""
+        self._current_txt_path = ""
         self.original_pixmap = None
         self.scale_factor_x = 1.0
         self.scale_factor_y = 1.0
@@ -247,8 +331,11 @@ class MainWindow(QMainWindow):
         self.offset_y = 0
         
         self.class_names = {}
+        self._class_name_vec = []
+        self._class_names_rev = 0
         self.confidence_threshold = DEFAULT_CONFIDENCE
         self.raw_detections = []
+        self._raw_conf = None
         
         self.draw_mode = False
         self.default_class = 0
@@ -259,11 +346,80 @@ class MainWindow(QMainWindow):
         
         self.class_file_path = ""
         
+        self._refresh_pending = False
+        self._list_stale = False
+        self._drawn_signature = None
+        self._delete_confirm_path = None
+        self._delete_confirm_deadline = 0.0
+        
+        # Shortcut dispatch, built once instead of an elif chain per key event
+        self._ctrl_key_table = {
+            Qt.Key_Z: self.undo,
+            Qt.Key_Y: self.redo,
+            Qt.Key_S: self.save_annotation,
+        }
+        self._key_table = {
+            Qt.Key_D: self.next_image,
+            Qt.Key_A: self.prev_image,
+            Qt.Key_S: self.save_annotation,
+            Qt.Key_W: self.toggle_draw_mode,
+            Qt.Key_M: self.toggle_mask_mode,
+            Qt.Key_R: self.reset_view,
+            Qt.Key_Q: self.skip_image,
+            Qt.Key_N: self.goto_next_unannotated,
+            Qt.Key_X: self.delete_current_image,
+            Qt.Key_Escape: self._handle_escape,
+            Qt.Key_Delete: self._handle_delete_key,
+        }
+        self._digit_classes = {Qt.Key_1 + i: i for i in range(9)}
+        self._digit_classes[Qt.Key_0] = 9
+        self._conf_timer = QTimer(self)
+        self._conf_timer.setSingleShot(True)
+        self._conf_timer.setInterval(80)
+        self._conf_timer.timeout.connect(self._apply_conf_now)
+        
+        self._edit_panels_built = False
+        self._stats_panel_built = False
+        
+        # Overlay drawing resources, built once instead of per box
+        self._pen_sel = QPen(QColor(0, 200, 255), 2)
+        self._pen_norm = QPen(QColor(255, 80, 80), 2)
+        self._label_font = QFont("Consolas", 9, QFont.Bold)
+        self._label_bg = QColor(0, 0, 0, 180)
+        self._label_fg = QColor(255, 255, 255)
+        
+        # Inference runs on a single worker thread; results from an older
+        # generation (the user already moved on) are dropped.
+        self._infer_pool = QThreadPool(self)
+        self._infer_pool.setMaxThreadCount(1)
+        self._infer_gen = 0
+        self._infer_revision = None
+        self._infer_task = None
+        
+        # Images being decoded on the thread pool, keyed by path
+        self._prefetch_tasks = {}
+        # Decoded frames by path, oldest first (bounded by _DECODED_CACHE_SIZE);
+        # kept out of QPixmapCache so they never evict the scaled bases
+        self._decoded = {}
+        # Path whose decode load_image is waiting on to show, if any
+        self._awaited_image_path = None
+        
+        # Annotation writes run on one worker thread (so writes to a path
+        # stay ordered); queued payloads are keyed by path and coalesce
+        self._save_pool = QThreadPool(self)
+        self._save_pool.setMaxThreadCount(1)
+        self._pending_saves = {}
+        self._pending_saves_lock = threading.Lock()
+        self._save_signals = SaveSignals()
+        self._save_signals.failed.connect(self._on_save_failed)
+        
         self.init_ui()
         self.auto_load_model()
     
     def init_ui(self):
         self.setStyleSheet(STYLESHEET)
+        # Room for several canvas-sized scaled frames (value in KB)
+        QPixmapCache.setCacheLimit(65536)
         
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -305,10 +461,12 @@ class MainWindow(QMainWindow):
         """)
         
         controls_tab = self.create_control_panel()
-        stats_tab = self.create_stats_panel()
+        # Statistics is built the first time its tab is opened
+        self._stats_slot = self._create_section_slot()
         
         self.tabs.addTab(controls_tab, "Controls")
-        self.tabs.addTab(stats_tab, "Statistics")
+        self.tabs.addTab(self._stats_slot, "Statistics")
+        self.tabs.currentChanged.connect(self._on_tab_changed)
         
         main_layout.addWidget(canvas_wrapper, 80)
         main_layout.addWidget(self.tabs, 20)
@@ -332,8 +490,7 @@ class MainWindow(QMainWindow):
         
         if self.icon_path:
             logo_label = QLabel()
-            logo_pixmap = QPixmap(self.icon_path).scaled(36, 36, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            logo_label.setPixmap(logo_pixmap)
+            logo_label.setPixmap(self._logo_pm)
             logo_label.setFixedSize(36, 36)
             header_row.addWidget(logo_label)
         
@@ -345,8 +502,10 @@ class MainWindow(QMainWindow):
         right_layout.addLayout(header_row)
         
         config_group = self.create_config_section()
-        detect_group = self.create_detections_section()
-        edit_group = self.create_edit_section()
+        # Detections and Edit are built when the first image loads or draw
+        # mode is toggled (see _ensure_edit_panels)
+        self._detect_slot = self._create_section_slot()
+        self._edit_slot = self._create_section_slot()
         mask_group = self.create_mask_section()
         nav_group = self.create_navigation_section()
         
@@ -355,8 +514,8 @@ class MainWindow(QMainWindow):
         self.lbl_info.setStyleSheet(INFO_LABEL_STYLE)
         
         right_layout.addWidget(config_group)
-        right_layout.addWidget(detect_group)
-        right_layout.addWidget(edit_group)
+        right_layout.addWidget(self._detect_slot)
+        right_layout.addWidget(self._edit_slot)
         right_layout.addWidget(mask_group)
         right_layout.addWidget(nav_group)
         right_layout.addWidget(self.lbl_info)
@@ -365,6 +524,26 @@ class MainWindow(QMainWindow):
         scroll_area.setWidget(right_panel)
         return scroll_area
     
+    def _create_section_slot(self):
+        slot = QWidget()
+        slot_layout = QVBoxLayout(slot)
+        slot_layout.setContentsMargins(0, 0, 0, 0)
+        return slot
+    
+    def _on_tab_changed(self, index):
+        if not self._stats_panel_built and self.tabs.widget(index) is self._stats_slot:
+            self._stats_panel_built = True
+            self._stats_slot.layout().addWidget(self.create_stats_panel())
+    
+    def _ensure_edit_panels(self):
+        """Build the Detections and Edit sections if they do not exist yet."""
+        if self._edit_panels_built:
+            return
+        self._edit_panels_built = True
+        self._detect_slot.layout().addWidget(self.create_detections_section())
+        self._edit_slot.layout().addWidget(self.create_edit_section())
+        self.update_class_combo()
+    
     def create_config_section(self):
         config_group = QGroupBox("Configuration")
         config_layout = QVBoxLayout(config_group)
@@ -559,7 +738,7 @@ class MainWindow(QMainWindow):
         self.btn_skip.setToolTip("Skip to next image without saving")
         self.btn_skip.clicked.connect(self.skip_image)
         self.btn_delete_image = QPushButton("Del [X]")
-        self.btn_delete_image.setToolTip("Delete current image")
+        self.btn_delete_image.setToolTip("Delete current image (press twice to confirm)")
         self.btn_delete_image.clicked.connect(self.delete_current_image)
         action_row.addWidget(self.btn_skip)
         action_row.addWidget(self.btn_delete_image)
@@ -617,6 +796,7 @@ class MainWindow(QMainWindow):
             QListWidget {{ background: {COLORS['surface']}; color: {COLORS['text']}; border: 1px solid {COLORS['border']}; font-size: 9px; }}
             QListWidget::item {{ padding: 2px; }}
         """)
+        self.class_stats_list.setItemDelegate(ClassShareDelegate(self.class_stats_list))
         class_layout.addWidget(self.class_stats_list)
         
         stats_layout.addWidget(class_group)
@@ -651,21 +831,41 @@ class MainWindow(QMainWindow):
             self.stats_progress_bar.setValue(0)
             return
         
+        self._flush_saves()
         total_images = len(self.image_list)
         annotated = 0
         total_boxes = 0
-        class_counts = {}
-        
-        for img in self.image_list:
-            txt_path = os.path.join(self.image_folder, os.path.splitext(img)[0] + ".txt")
-            if os.path.exists(txt_path):
-                annotated += 1
-                boxes = self.file_mgr.load_annotations(txt_path)
-                total_boxes += len(boxes)
-                for box in boxes:
-                    cls = box['class']
-                    class_name = self.class_names.get(cls, f"C{cls}")
-                    class_counts[class_name] = class_counts.get(class_name, 0) + 1
+        class_id_counts = Counter()
+        
+        # One directory scan gives every .txt's mtime and size; only files
+        # that changed since the last refresh are parsed again
+        file_stats = self.file_mgr.annotation_file_stats(self.image_folder)
+        # The same scan refreshes the annotated-stem set, picking up files
+        # added or removed outside the app without another directory read
+        self._annotated = set(file_stats)
+        cache = self._stats_cache
+        for stem, txt_path in zip(self._image_stems, self._txt_paths):
+            key = file_stats.get(stem)
+            if key is None:
+                continue
+            annotated += 1
+            cached = cache.get(txt_path)
+            if cached is None or cached[0] != key:
+                classes = self.file_mgr.load_annotation_classes(txt_path)
+                if len(classes) and classes.min() >= 0:
+                    counts = np.bincount(classes)
+                    ids = np.flatnonzero(counts)
+                    file_counts = Counter(dict(zip(ids.tolist(), counts[ids].tolist())))
+                else:
+                    file_counts = Counter(classes.tolist())
+                cached = (key, len(classes), file_counts)
+                cache[txt_path] = cached
+            total_boxes += cached[1]
+            class_id_counts.update(cached[2])
+        
+        class_counts = Counter()
+        for cls, count in class_id_counts.items():
+            class_counts[self.class_names.get(cls, f"C{cls}")] += count
         
         unannotated = total_images - annotated
         avg_boxes = total_boxes / annotated if annotated > 0 else 0
@@ -676,15 +876,27 @@ class MainWindow(QMainWindow):
         self.lbl_total_boxes.setText(f"Boxes: {total_boxes}")
         self.lbl_avg_boxes.setText(f"Avg/Image: {avg_boxes:.1f}")
         
-        self.class_stats_list.clear()
-        sorted_classes = sorted(class_counts.items(), key=lambda x: x[1], reverse=True)
-        for class_name, count in sorted_classes:
-            percentage = (count / total_boxes * 100) if total_boxes > 0 else 0
-            bar = "█" * int(percentage / 10) + "░" * (10 - int(percentage / 10))
-            self.class_stats_list.addItem(f"{class_name}: {count} ({percentage:.0f}%) {bar}")
+        rows = []
+        shares = []
+        for class_name, count in class_counts.most_common():
+            share = count / total_boxes if total_boxes > 0 else 0.0
+            rows.append(f"{class_name}: {count} ({share * 100:.0f}%)")
+            shares.append(share)
+        
+        # The share bar is painted by ClassShareDelegate from Qt.UserRole
+        stats_list = self.class_stats_list
+        stats_list.blockSignals(True)
+        stats_list.setUpdatesEnabled(False)
+        stats_list.clear()
+        stats_list.addItems(rows)
+        for row, share in enumerate(shares):
+            stats_list.item(row).setData(Qt.UserRole, share)
+        stats_list.setUpdatesEnabled(True)
+        stats_list.blockSignals(False)
         
         self.stats_progress_bar.setMaximum(total_images)
         self.stats_progress_bar.setValue(annotated)
+        self.progress_bar.setValue(annotated)
     
     def update_zoom_label(self):
         zoom_percent = int(self.image_label.zoom_level * 100)
@@ -700,9 +912,12 @@ class MainWindow(QMainWindow):
             self._load_model_from_path(path)
     
     def load_yolov4_model(self):
+        # Three prompts back to back: Qt's own dialog skips the native
+        # shell's slow per-dialog startup
+        dialog_options = QFileDialog.DontUseNativeDialog
         cfg_path, _ = QFileDialog.getOpenFileName(
             self, "Select YOLOv4 Config File (.cfg)", "", 
-            "Config Files (*.cfg);;All Files (*)"
+            "Config Files (*.cfg);;All Files (*)", options=dialog_options
         )
         if not cfg_path:
             return
@@ -710,29 +925,36 @@ class MainWindow(QMainWindow):
         base_dir = os.path.dirname(cfg_path)
         cfg_basename = os.path.splitext(os.path.basename(cfg_path))[0]
         
+        # One directory pass; names candidates ranked as any .names file,
+        # then a .txt with "names" in it, then a .txt sharing the cfg prefix
+        # (the prefix also covers names containing the full cfg basename)
+        cfg_prefix = cfg_basename.split('_')[0]
         auto_weights = None
-        for f in os.listdir(base_dir):
-            if f.endswith('.weights'):
-                if cfg_basename.split('_')[0] in f or cfg_basename in f:
-                    auto_weights = os.path.join(base_dir, f)
-                    break
-        
-        auto_names = None
-        for ext in ['.names', '.txt']:
-            for f in os.listdir(base_dir):
-                if f.lower().endswith(ext) and 'names' in f.lower():
-                    auto_names = os.path.join(base_dir, f)
-                    break
-            if not auto_names:
-                for f in os.listdir(base_dir):
-                    if f.lower().endswith(ext) and cfg_basename.split('_')[0] in f:
-                        auto_names = os.path.join(base_dir, f)
-                        break
+        names_by_rank = [None, None, None]
+        with os.scandir(base_dir) as entries:
+            for entry in entries:
+                f = entry.name
+                lower = f.lower()
+                if f.endswith('.weights'):
+                    if auto_weights is None and cfg_prefix in f:
+                        auto_weights = entry.path
+                    continue
+                if lower.endswith('.names'):
+                    rank = 0
+                elif lower.endswith('.txt') and 'names' in lower:
+                    rank = 1
+                elif lower.endswith('.txt') and cfg_prefix in f:
+                    rank = 2
+                else:
+                    continue
+                if names_by_rank[rank] is None:
+                    names_by_rank[rank] = entry.path
+        auto_names = next((p for p in names_by_rank if p), None)
         
         weights_path, _ = QFileDialog.getOpenFileName(
             self, "Select YOLOv4 Weights File (.weights)", 
             auto_weights if auto_weights else base_dir,
-            "Weights Files (*.weights);;All Files (*)"
+            "Weights Files (*.weights);;All Files (*)", options=dialog_options
         )
         if not weights_path:
             return
@@ -740,7 +962,7 @@ class MainWindow(QMainWindow):
         names_path, _ = QFileDialog.getOpenFileName(
             self, "Select Class Names File (.names or .txt)", 
             auto_names if auto_names else base_dir,
-            "Names Files (*.names *.txt);;All Files (*)"
+            "Names Files (*.names *.txt);;All Files (*)", options=dialog_options
         )
         if not names_path:
             return
@@ -802,9 +1024,14 @@ class MainWindow(QMainWindow):
         name, ok = QInputDialog.getText(self, "Add New Class", "Enter class name:")
         if ok and name.strip():
             name = name.strip()
-            new_id = max(self.class_names.keys()) + 1 if self.class_names else 0
+            first_class = not self.class_names
+            new_id = 0 if first_class else max(self.class_names.keys()) + 1
             self.class_names[new_id] = name
-            self.update_class_combo()
+            if first_class:
+                # First class switches the editor from the spin box to the combo
+                self.update_class_combo()
+            else:
+                self._append_class_to_combo(new_id, name)
             self.save_classes_to_file()
             QMessageBox.information(self, "Success", f"Added class {new_id}: {name}")
     
@@ -892,28 +1119,61 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Warning", f"Could not save classes: {str(e)}")
     
     def update_class_combo(self):
-        self.combo_class.blockSignals(True)
-        self.combo_class.clear()
+        self._rebuild_class_name_cache()
+        if not self._edit_panels_built:
+            # Populated when the Edit section is built
+            return
+        combo = self.combo_class
+        combo.blockSignals(True)
+        combo.setUpdatesEnabled(False)
+        combo.clear()
         
         if self.class_names:
-            self.combo_class.setVisible(True)
+            combo.setVisible(True)
             self.spin_class.setVisible(False)
-            for idx in sorted(self.class_names.keys()):
-                self.combo_class.addItem(f"{idx}: {self.class_names[idx]}", idx)
+            ids = sorted(self.class_names)
+            combo.addItems([f"{idx}: {self.class_names[idx]}" for idx in ids])
+            for row, idx in enumerate(ids):
+                combo.setItemData(row, idx)
         else:
-            self.combo_class.setVisible(False)
+            combo.setVisible(False)
             self.spin_class.setVisible(True)
         
+        combo.setUpdatesEnabled(True)
+        combo.blockSignals(False)
+    
+    def _append_class_to_combo(self, idx, name):
+        """Add one class with the highest id without rebuilding the combo."""
+        self._class_name_vec.append(name)
+        self._class_names_rev += 1
+        if not self._edit_panels_built:
+            return
+        self.combo_class.blockSignals(True)
+        self.combo_class.addItem(f"{idx}: {name}", idx)
         self.combo_class.blockSignals(False)
     
+    def _rebuild_class_name_cache(self):
+        """Index class names by id so per-box lookups are a list access."""
+        names = self.class_names
+        size = max(names) + 1 if names else 0
+        self._class_name_vec = [names.get(i, f"Class {i}") for i in range(size)]
+        self._class_names_rev += 1
+    
     def get_class_name(self, class_id):
-        return self.class_names.get(class_id, f"Class {class_id}")
+        vec = self._class_name_vec
+        if 0 <= class_id < len(vec):
+            return vec[class_id]
+        return f"Class {class_id}"
     
     def open_directory(self):
         dir_path = QFileDialog.getExistingDirectory(self, "Select Image Folder")
         if dir_path:
             self.image_folder = dir_path
+            self._annotated = None
+            self._saved_payloads.clear()
+            self._stats_cache.clear()
             self.image_list = self.file_mgr.get_image_list(dir_path, VALID_IMAGE_EXTENSIONS)
+            self._index_image_list()
             
             if not self.image_list:
                 QMessageBox.warning(self, "Warning", "No images found in folder")
@@ -925,7 +1185,7 @@ class MainWindow(QMainWindow):
             self.current_index = 0
             self.load_image()
             
-            labeled_count = sum(1 for img in self.image_list if self.file_mgr.annotation_exists(self.image_folder, img))
+            labeled_count = self._count_annotated()
             if labeled_count > 0:
                 QMessageBox.information(self, "Folder Loaded", 
                     f"Found {len(self.image_list)} images\n{labeled_count} have existing labels\n{len(self.image_list) - labeled_count} need annotation")
@@ -944,6 +1204,8 @@ class MainWindow(QMainWindow):
             self.extract_video_frames(video_path, output_folder, frame_interval, max_frames)
     
     def extract_video_frames(self, video_path, output_folder, frame_interval, max_frames):
+        import cv2
+        
         os.makedirs(output_folder, exist_ok=True)
         
         cap = cv2.VideoCapture(video_path, cv2.CAP_ANY)
@@ -1094,7 +1356,11 @@ class MainWindow(QMainWindow):
         msg_box.exec_()
         
         self.image_folder = output_folder
+        self._annotated = None
+        self._saved_payloads.clear()
+        self._stats_cache.clear()
         self.image_list = self.file_mgr.get_image_list(output_folder, VALID_IMAGE_EXTENSIONS)
+        self._index_image_list()
         
         if self.image_list:
             self.progress_bar.setMaximum(len(self.image_list))
@@ -1110,14 +1376,25 @@ class MainWindow(QMainWindow):
             ascii_name = "video"
         return "".join(c if c.isalnum() or c in "._-" else "_" for c in ascii_name)
     
+    def _get_annotated(self):
+        if self._annotated is None:
+            self._annotated = self.file_mgr.existing_annotation_stems(self.image_folder)
+        return self._annotated
+    
+    def _index_image_list(self):
+        """Derive per-image stems and .txt paths once per folder load."""
+        folder = self.image_folder
+        self._image_stems = [os.path.splitext(img)[0] for img in self.image_list]
+        self._txt_paths = [os.path.join(folder, stem + ".txt") for stem in self._image_stems]
+    
+    def _count_annotated(self):
+        annotated = self._get_annotated()
+        return sum(1 for stem in self._image_stems if stem in annotated)
+    
     def update_progress(self):
         if not self.image_list:
             return
-        annotated = sum(
-            1 for img in self.image_list 
-            if self.file_mgr.annotation_exists(self.image_folder, img)
-        )
-        self.progress_bar.setValue(annotated)
+        self.progress_bar.setValue(self._count_annotated())
     
     def load_image(self):
         if not self.image_list:
@@ -1125,21 +1402,41 @@ class MainWindow(QMainWindow):
         
         filename = self.image_list[self.current_index]
         self.current_image_path = os.path.join(self.image_folder, filename)
-        self.original_pixmap = QPixmap(self.current_image_path)
+        self._current_basename = filename
+        self._current_stem = self._image_stems[self.current_index]
+        self._current_txt_path = self._txt_paths[self.current_index]
+        self._delete_confirm_path = None
+        self._infer_gen += 1
+        self._infer_task = None
         
         self.image_label.zoom_level = 1.0
         self.image_label.pan_offset_x = 0
         self.image_label.pan_offset_y = 0
         self.update_zoom_label()
         
-        self.display_image()
+        pixmap = self._decoded.pop(self.current_image_path, None)
+        if pixmap is None:
+            # Decode on a worker thread; _on_image_decoded shows it. The
+            # annotations below are still loaded now, so saves and edits
+            # always target the image being shown.
+            self.original_pixmap = None
+            self._awaited_image_path = self.current_image_path
+            self._request_decode(self.current_image_path)
+            self.image_label.update()
+        else:
+            self._awaited_image_path = None
+            self._remember_decoded(self.current_image_path, pixmap)
+            self.original_pixmap = pixmap
+            self.display_image()
         
         self.lbl_info.setText(f"{filename}  ({self.current_index + 1}/{len(self.image_list)})")
         self.state_mgr.clear()
         
-        txt_path = os.path.splitext(self.current_image_path)[0] + ".txt"
+        txt_path = self._current_txt_path
+        self._flush_saves(txt_path)
         self.annotation_mgr.clear()
         self.raw_detections = []
+        self._raw_conf = None
         
         if os.path.exists(txt_path):
             boxes = self.file_mgr.load_annotations(txt_path)
@@ -1157,129 +1454,222 @@ class MainWindow(QMainWindow):
         
         self.update_list_widget()
         self.draw_boxes()
+        self._prefetch_neighbours()
+    
+    def _prefetch_neighbours(self):
+        """Decode the previous and next images in the background."""
+        for idx in (self.current_index + 1, self.current_index - 1):
+            if not 0 <= idx < len(self.image_list):
+                continue
+            path = os.path.join(self.image_folder, self.image_list[idx])
+            if path not in self._decoded:
+                self._request_decode(path)
+    
+    def _request_decode(self, path):
+        """Decode path into a QImage on the thread pool (once per path)."""
+        if path in self._prefetch_tasks:
+            return
+        task = PrefetchTask(path)
+        task.signals.loaded.connect(self._on_image_decoded)
+        self._prefetch_tasks[path] = task
+        QThreadPool.globalInstance().start(task)
+    
+    def _on_image_decoded(self, path, image):
+        task = self._prefetch_tasks.get(path)
+        if task is None or task.signals is not self.sender():
+            # Invalidated (file changed or deleted) while decoding
+            return
+        del self._prefetch_tasks[path]
+        
+        awaited = path == self._awaited_image_path
+        if awaited:
+            self._awaited_image_path = None
+        if image.isNull():
+            if awaited:
+                self.lbl_info.setText(f"Could not load {self._current_basename}")
+                self.lbl_info.setStyleSheet(STATUS_ERROR_STYLE)
+            return
+        
+        pixmap = QPixmap.fromImage(image)
+        self._remember_decoded(path, pixmap)
+        if awaited:
+            self.original_pixmap = pixmap
+            self.display_image()
+            self.draw_boxes()
+    
+    def _remember_decoded(self, path, pixmap):
+        """Keep a decoded frame as the newest entry, evicting the oldest."""
+        decoded = self._decoded
+        decoded.pop(path, None)
+        decoded[path] = pixmap
+        while len(decoded) > self._DECODED_CACHE_SIZE:
+            del decoded[next(iter(decoded))]
+    
+    def _forget_cached_image(self, path):
+        self._prefetch_tasks.pop(path, None)
+        self._decoded.pop(path, None)
     
     def run_inference(self):
-        self.raw_detections = self.model_mgr.run_inference(
+        self._infer_gen += 1
+        task = InferenceTask(
+            self.model_mgr,
             self.current_image_path, 
-            self.confidence_threshold
+            self.confidence_threshold,
+            self._infer_gen
+        )
+        task.signals.finished.connect(self._on_inference_finished)
+        self._infer_task = task
+        self._infer_revision = self.annotation_mgr.revision
+        # Queued passes for images already left behind would only be dropped
+        self._infer_pool.clear()
+        self._infer_pool.start(task)
+    
+    def _inference_pending(self):
+        """True while the model has not yet filled in the shown image's boxes."""
+        return (self._infer_task is not None
+                and self.annotation_mgr.revision == self._infer_revision)
+    
+    def _on_inference_finished(self, generation, image_path, detections):
+        if generation != self._infer_gen or image_path != self.current_image_path:
+            return
+        self._infer_task = None
+        if self.annotation_mgr.revision != self._infer_revision:
+            # The user started editing before the model finished
+            return
+        self.raw_detections = detections
+        self._raw_conf = np.fromiter(
+            (d['conf'] for d in detections), dtype=np.float64, count=len(detections)
         )
         self.apply_confidence_filter()
     
     def apply_confidence_filter(self):
-        filtered = self.annotation_mgr.filter_by_confidence(
-            self.raw_detections, 
-            self.confidence_threshold
-        )
+        raw = self.raw_detections
+        if self._raw_conf is not None and len(self._raw_conf) == len(raw):
+            # Threshold compare runs over the conf column in one NumPy op;
+            # only the surviving boxes are copied into dicts
+            keep = np.flatnonzero(self._raw_conf >= self.confidence_threshold)
+            filtered = [raw[i].copy() for i in keep]
+        else:
+            filtered = self.annotation_mgr.filter_by_confidence(
+                raw, 
+                self.confidence_threshold
+            )
         self.annotation_mgr.set_boxes(filtered)
-        self.update_list_widget()
-        self.draw_boxes()
+        self._schedule_refresh()
     
     def on_confidence_changed(self, value):
         self.confidence_threshold = value / 100.0
         self.lbl_conf_value.setText(f"{self.confidence_threshold:.2f}")
+        # Refilter once the slider settles rather than on every tick
+        self._conf_timer.start()
+    
+    def _apply_conf_now(self):
         if self.raw_detections:
-            self.state_mgr.save_state(self.annotation_mgr.get_boxes())
+            previous = self.annotation_mgr.boxes
             self.apply_confidence_filter()
+            self.state_mgr.push(ReplaceBoxes(previous))
     
     def display_image(self):
         if self.original_pixmap:
-            scaled = self.original_pixmap.scaled(
-                self.image_label.size(), 
-                Qt.KeepAspectRatio, 
-                Qt.SmoothTransformation
-            )
-            self.image_label.setPixmap(scaled)
-            self.scale_factor_x = scaled.width() / self.original_pixmap.width()
-            self.scale_factor_y = scaled.height() / self.original_pixmap.height()
-            self.offset_x = (self.image_label.width() - scaled.width()) / 2
-            self.offset_y = (self.image_label.height() - scaled.height()) / 2
+            scaled_w, scaled_h = self.image_label.get_base_size()
+            self.scale_factor_x = scaled_w / self.original_pixmap.width()
+            self.scale_factor_y = scaled_h / self.original_pixmap.height()
+            self.offset_x = (self.image_label.width() - scaled_w) / 2
+            self.offset_y = (self.image_label.height() - scaled_h) / 2
     
     def draw_boxes(self):
         if not self.original_pixmap:
             return
         
-        zoom = self.image_label.zoom_level
-        pan_x = self.image_label.pan_offset_x
-        pan_y = self.image_label.pan_offset_y
-        
-        base_scaled = self.original_pixmap.scaled(
-            self.image_label.size(), 
-            Qt.KeepAspectRatio, 
-            Qt.SmoothTransformation
+        # Everything the overlay is painted from; when none of it changed
+        # (e.g. a hotkey that set a box to its current class) skip the repaint
+        label = self.image_label
+        signature = (
+            self.original_pixmap.cacheKey(), self.annotation_mgr.revision,
+            self.annotation_mgr.selected_index, self.selected_mask_index,
+            id(self.mask_rectangles), len(self.mask_rectangles),
+            self._class_names_rev, label.zoom_level,
+            label.pan_offset_x, label.pan_offset_y, label.width(), label.height(),
         )
+        had_temp_rect = label.clear_temp_rect()
+        if signature == self._drawn_signature and not had_temp_rect:
+            return
+        self._drawn_signature = signature
         
-        zoomed_w = int(base_scaled.width() * zoom)
-        zoomed_h = int(base_scaled.height() * zoom)
-        zoomed = self.original_pixmap.scaled(zoomed_w, zoomed_h, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        
-        canvas = QPixmap(self.image_label.size())
-        canvas.fill(QColor(COLORS['canvas']))
+        # Boxes, selection or view may have changed under the cursor
+        label.invalidate_hover_cache()
+        label.update()
+    
+    def paint_annotations(self, painter, adj_offset_x, adj_offset_y, detailed=True):
+        """
+        Paint boxes, masks and the plate reading onto the canvas painter.
         
-        painter = QPainter(canvas)
-        painter.setRenderHint(QPainter.Antialiasing)
+        With detailed=False (while a temporary box or mask is being drawn)
+        boxes are drawn as plain outlines without labels or handles.
+        """
+        zoom = self.image_label.zoom_level
+        orig_w, orig_h = self.original_pixmap.width(), self.original_pixmap.height()
+        effective_scale_x = self.scale_factor_x * zoom
+        effective_scale_y = self.scale_factor_y * zoom
         
-        zoomed_offset_x = (self.image_label.width() - zoomed_w) / 2
-        zoomed_offset_y = (self.image_label.height() - zoomed_h) / 2
-        draw_x = int(zoomed_offset_x + pan_x)
-        draw_y = int(zoomed_offset_y + pan_y)
-        painter.drawPixmap(draw_x, draw_y, zoomed)
+        if not detailed:
+            self._draw_existing_boxes_zoomed(painter, orig_w, orig_h, effective_scale_x, effective_scale_y, adj_offset_x, adj_offset_y)
+            self._draw_existing_masks_zoomed(painter, orig_w, orig_h, effective_scale_x, effective_scale_y, adj_offset_x, adj_offset_y)
+            return
         
-        orig_w, orig_h = self.original_pixmap.width(), self.original_pixmap.height()
         boxes = self.annotation_mgr.get_boxes()
         selected_idx = self.annotation_mgr.selected_index
+        rects = self.annotation_mgr.get_pixel_rects(orig_w, orig_h, effective_scale_x, effective_scale_y)
+        dx, dy = int(adj_offset_x), int(adj_offset_y)
         
-        effective_scale_x = self.scale_factor_x * zoom
-        effective_scale_y = self.scale_factor_y * zoom
-        adj_offset_x = zoomed_offset_x + pan_x
-        adj_offset_y = zoomed_offset_y + pan_y
+        painter.setFont(self._label_font)
+        metrics = painter.fontMetrics()
+        get_class_name = self.get_class_name
         
-        for i, box in enumerate(boxes):
-            rect = BoxGeometry.get_box_rect_px(box, orig_w, orig_h, effective_scale_x, effective_scale_y)
-            
+        # Boxes entirely off-canvas (zoomed/panned away) are skipped; the
+        # margin keeps handles of boxes just past the edge
+        hs = HANDLE_SIZE
+        visible = self.image_label.rect().adjusted(-hs, -hs, hs, hs)
+        
+        for i, (box, rect) in enumerate(zip(boxes, rects)):
             if not rect:
                 continue
             
-            rect.translate(int(adj_offset_x), int(adj_offset_y))
+            rect = rect.translated(dx, dy)
+            # adjusted() keeps zero-width/height boxes (drawn as lines) testable
+            if not visible.intersects(rect.adjusted(0, 0, 1, 1)):
+                continue
             is_selected = (i == selected_idx)
             
-            if is_selected:
-                pen = QPen(QColor(0, 200, 255), 2)
-            else:
-                pen = QPen(QColor(255, 80, 80), 2)
-            
-            painter.setPen(pen)
+            painter.setPen(self._pen_sel if is_selected else self._pen_norm)
             painter.setBrush(Qt.NoBrush)
             painter.drawRect(rect)
             
             if is_selected:
                 self.draw_handles(painter, rect)
             
-            painter.setFont(QFont("Consolas", 9, QFont.Bold))
-            label = f"{self.get_class_name(box['class'])} {box.get('conf', 1.0):.2f}"
+            label = f"{get_class_name(box['class'])} {box.get('conf', 1.0):.2f}"
             
-            text_rect = painter.fontMetrics().boundingRect(label)
+            text_rect = metrics.boundingRect(label)
             painter.fillRect(
                 int(rect.x()), int(rect.y()) - text_rect.height() - 2,
                 text_rect.width() + 6, text_rect.height() + 2, 
-                QColor(0, 0, 0, 180)
+                self._label_bg
             )
-            painter.setPen(QColor(255, 255, 255))
+            painter.setPen(self._label_fg)
             painter.drawText(int(rect.x()) + 3, int(rect.y()) - 4, label)
         
         self._draw_existing_masks_zoomed(painter, orig_w, orig_h, effective_scale_x, effective_scale_y, adj_offset_x, adj_offset_y)
         
-        plate_text = self.annotation_mgr.get_plate_reading(self.class_names)
+        plate_text = self.annotation_mgr.get_plate_reading(self._class_name_vec)
         if plate_text:
             painter.setFont(QFont("Consolas", 14, QFont.Bold))
             text_rect = painter.fontMetrics().boundingRect(plate_text)
-            bg_x = (canvas.width() - text_rect.width() - 24) // 2
-            bg_y = canvas.height() - 38
+            bg_x = (self.image_label.width() - text_rect.width() - 24) // 2
+            bg_y = self.image_label.height() - 38
             painter.fillRect(bg_x, bg_y, text_rect.width() + 24, 32, QColor(0, 0, 0, 220))
             painter.setPen(QColor(100, 255, 150))
             painter.drawText(bg_x + 12, bg_y + 23, plate_text)
-        
-        painter.end()
-        self.image_label.setPixmap(canvas)
     
     def draw_handles(self, painter, rect):
         hs = HANDLE_SIZE
@@ -1310,6 +1700,7 @@ class MainWindow(QMainWindow):
             painter.drawRect(ex, ey, hs, hs)
     
     def toggle_draw_mode(self):
+        self._ensure_edit_panels()
         if self.mask_mode:
             self.toggle_mask_mode()
         
@@ -1317,11 +1708,11 @@ class MainWindow(QMainWindow):
         if self.draw_mode:
             self.btn_draw_mode.setText("Draw: ON [W]")
             self.btn_draw_mode.setChecked(True)
-            self.image_label.setCursor(Qt.CrossCursor)
+            self.image_label.set_cursor_shape(Qt.CrossCursor)
         else:
             self.btn_draw_mode.setText("Draw: OFF [W]")
             self.btn_draw_mode.setChecked(False)
-            self.image_label.setCursor(Qt.ArrowCursor)
+            self.image_label.set_cursor_shape(Qt.ArrowCursor)
     
     def toggle_mask_mode(self):
         if self.draw_mode:
@@ -1334,12 +1725,12 @@ class MainWindow(QMainWindow):
             self.btn_mask_mode.setText("Mask: ON [M]")
             self.btn_mask_mode.setChecked(True)
             self.btn_mask_mode.setStyleSheet(f"background-color: #666; color: #ff6666; font-weight: bold;")
-            self.image_label.setCursor(Qt.CrossCursor)
+            self.image_label.set_cursor_shape(Qt.CrossCursor)
         else:
             self.btn_mask_mode.setText("Mask: OFF [M]")
             self.btn_mask_mode.setChecked(False)
             self.btn_mask_mode.setStyleSheet(f"background-color: #555; color: white;")
-            self.image_label.setCursor(Qt.ArrowCursor)
+            self.image_label.set_cursor_shape(Qt.ArrowCursor)
     
     def mask_list_selection_changed(self, row):
         self.selected_mask_index = row
@@ -1374,59 +1765,7 @@ class MainWindow(QMainWindow):
     def draw_temp_mask(self, start, end):
         if not self.original_pixmap:
             return
-        
-        zoom = self.image_label.zoom_level
-        pan_x = self.image_label.pan_offset_x
-        pan_y = self.image_label.pan_offset_y
-        
-        base_scaled = self.original_pixmap.scaled(
-            self.image_label.size(), 
-            Qt.KeepAspectRatio, 
-            Qt.SmoothTransformation
-        )
-        
-        zoomed_w = int(base_scaled.width() * zoom)
-        zoomed_h = int(base_scaled.height() * zoom)
-        zoomed = self.original_pixmap.scaled(zoomed_w, zoomed_h, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        
-        canvas = QPixmap(self.image_label.size())
-        canvas.fill(QColor(COLORS['canvas']))
-        
-        painter = QPainter(canvas)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        zoomed_offset_x = (self.image_label.width() - zoomed_w) / 2
-        zoomed_offset_y = (self.image_label.height() - zoomed_h) / 2
-        draw_x = int(zoomed_offset_x + pan_x)
-        draw_y = int(zoomed_offset_y + pan_y)
-        painter.drawPixmap(draw_x, draw_y, zoomed)
-        
-        orig_w, orig_h = self.original_pixmap.width(), self.original_pixmap.height()
-        effective_scale_x = self.scale_factor_x * zoom
-        effective_scale_y = self.scale_factor_y * zoom
-        adj_offset_x = zoomed_offset_x + pan_x
-        adj_offset_y = zoomed_offset_y + pan_y
-        
-        self._draw_existing_boxes_zoomed(painter, orig_w, orig_h, effective_scale_x, effective_scale_y, adj_offset_x, adj_offset_y)
-        self._draw_existing_masks_zoomed(painter, orig_w, orig_h, effective_scale_x, effective_scale_y, adj_offset_x, adj_offset_y)
-        
-        temp_rect = QRect(
-            int(min(start.x(), end.x())), int(min(start.y(), end.y())), 
-            int(abs(end.x() - start.x())), int(abs(end.y() - start.y()))
-        )
-        
-        painter.fillRect(temp_rect, QColor(128, 128, 128, 240))
-        
-        pen = QPen(QColor(200, 200, 200), 2, Qt.DashLine)
-        painter.setPen(pen)
-        painter.drawRect(temp_rect)
-        
-        painter.setPen(QColor(255, 255, 255))
-        painter.setFont(QFont("Consolas", 9, QFont.Bold))
-        painter.drawText(int(min(start.x(), end.x())) + 4, int(min(start.y(), end.y())) + 14, "MASK")
-        
-        painter.end()
-        self.image_label.setPixmap(canvas)
+        self.image_label.set_temp_rect(start, end, 'mask')
     
     def finalize_new_mask(self, start, end):
         if not self.original_pixmap:
@@ -1436,13 +1775,9 @@ class MainWindow(QMainWindow):
         pan_x = self.image_label.pan_offset_x
         pan_y = self.image_label.pan_offset_y
         
-        base_scaled = self.original_pixmap.scaled(
-            self.image_label.size(), 
-            Qt.KeepAspectRatio, 
-            Qt.SmoothTransformation
-        )
-        zoomed_w = int(base_scaled.width() * zoom)
-        zoomed_h = int(base_scaled.height() * zoom)
+        base_w, base_h = self.image_label.get_base_size()
+        zoomed_w = int(base_w * zoom)
+        zoomed_h = int(base_h * zoom)
         zoomed_offset_x = (self.image_label.width() - zoomed_w) / 2
         zoomed_offset_y = (self.image_label.height() - zoomed_h) / 2
         
@@ -1531,14 +1866,13 @@ class MainWindow(QMainWindow):
                 painter.drawRect(rect)
     
     def _draw_existing_boxes_zoomed(self, painter, orig_w, orig_h, scale_x, scale_y, offset_x, offset_y):
-        boxes = self.annotation_mgr.get_boxes()
         selected_idx = self.annotation_mgr.selected_index
-        for i, box in enumerate(boxes):
-            rect = BoxGeometry.get_box_rect_px(box, orig_w, orig_h, scale_x, scale_y)
+        rects = self.annotation_mgr.get_pixel_rects(orig_w, orig_h, scale_x, scale_y)
+        dx, dy = int(offset_x), int(offset_y)
+        for i, rect in enumerate(rects):
             if rect:
-                rect.translate(int(offset_x), int(offset_y))
-                pen = QPen(QColor(0, 200, 255), 2) if i == selected_idx else QPen(QColor(255, 80, 80), 2)
-                painter.setPen(pen)
+                rect = rect.translated(dx, dy)
+                painter.setPen(self._pen_sel if i == selected_idx else self._pen_norm)
                 painter.setBrush(Qt.NoBrush)
                 painter.drawRect(rect)
     
@@ -1568,6 +1902,7 @@ class MainWindow(QMainWindow):
                 cv2.rectangle(img, (x1, y1), (x2, y2), (128, 128, 128), -1)
             
             cv2.imwrite(self.current_image_path, img)
+            self._forget_cached_image(self.current_image_path)
             self.original_pixmap = QPixmap(self.current_image_path)
             
         except Exception as e:
@@ -1580,69 +1915,7 @@ class MainWindow(QMainWindow):
     def draw_temp_box(self, start, end):
         if not self.original_pixmap:
             return
-        
-        zoom = self.image_label.zoom_level
-        pan_x = self.image_label.pan_offset_x
-        pan_y = self.image_label.pan_offset_y
-        
-        base_scaled = self.original_pixmap.scaled(
-            self.image_label.size(), 
-            Qt.KeepAspectRatio, 
-            Qt.SmoothTransformation
-        )
-        
-        zoomed_w = int(base_scaled.width() * zoom)
-        zoomed_h = int(base_scaled.height() * zoom)
-        zoomed = self.original_pixmap.scaled(zoomed_w, zoomed_h, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        
-        canvas = QPixmap(self.image_label.size())
-        canvas.fill(QColor(COLORS['canvas']))
-        
-        painter = QPainter(canvas)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        zoomed_offset_x = (self.image_label.width() - zoomed_w) / 2
-        zoomed_offset_y = (self.image_label.height() - zoomed_h) / 2
-        draw_x = int(zoomed_offset_x + pan_x)
-        draw_y = int(zoomed_offset_y + pan_y)
-        painter.drawPixmap(draw_x, draw_y, zoomed)
-        
-        orig_w, orig_h = self.original_pixmap.width(), self.original_pixmap.height()
-        effective_scale_x = self.scale_factor_x * zoom
-        effective_scale_y = self.scale_factor_y * zoom
-        adj_offset_x = zoomed_offset_x + pan_x
-        adj_offset_y = zoomed_offset_y + pan_y
-        
-        boxes = self.annotation_mgr.get_boxes()
-        selected_idx = self.annotation_mgr.selected_index
-        for i, box in enumerate(boxes):
-            rect = BoxGeometry.get_box_rect_px(box, orig_w, orig_h, effective_scale_x, effective_scale_y)
-            if rect:
-                rect.translate(int(adj_offset_x), int(adj_offset_y))
-                pen = QPen(QColor(0, 200, 255), 2) if i == selected_idx else QPen(QColor(255, 80, 80), 2)
-                painter.setPen(pen)
-                painter.drawRect(rect)
-        
-        self._draw_existing_masks_zoomed(painter, orig_w, orig_h, effective_scale_x, effective_scale_y, adj_offset_x, adj_offset_y)
-        
-        pen = QPen(QColor(0, 180, 255), 2, Qt.DashLine)
-        painter.setPen(pen)
-        
-        temp_rect = QRect(
-            int(min(start.x(), end.x())), int(min(start.y(), end.y())), 
-            int(abs(end.x() - start.x())), int(abs(end.y() - start.y()))
-        )
-        painter.drawRect(temp_rect)
-        
-        painter.setPen(QColor(0, 200, 255))
-        painter.setFont(QFont("Consolas", 9, QFont.Bold))
-        painter.drawText(
-            int(min(start.x(), end.x())), int(min(start.y(), end.y())) - 4, 
-            f"New: {self.get_class_name(self.default_class)}"
-        )
-        
-        painter.end()
-        self.image_label.setPixmap(canvas)
+        self.image_label.set_temp_rect(start, end, 'box')
     
     def finalize_new_box(self, start, end):
         if not self.original_pixmap:
@@ -1652,13 +1925,9 @@ class MainWindow(QMainWindow):
         pan_x = self.image_label.pan_offset_x
         pan_y = self.image_label.pan_offset_y
         
-        base_scaled = self.original_pixmap.scaled(
-            self.image_label.size(), 
-            Qt.KeepAspectRatio, 
-            Qt.SmoothTransformation
-        )
-        zoomed_w = int(base_scaled.width() * zoom)
-        zoomed_h = int(base_scaled.height() * zoom)
+        base_w, base_h = self.image_label.get_base_size()
+        zoomed_w = int(base_w * zoom)
+        zoomed_h = int(base_h * zoom)
         zoomed_offset_x = (self.image_label.width() - zoomed_w) / 2
         zoomed_offset_y = (self.image_label.height() - zoomed_h) / 2
         
@@ -1683,13 +1952,13 @@ class MainWindow(QMainWindow):
             px_x1, px_y1, px_x2, px_y2, orig_w, orig_h
         )
         
-        self.state_mgr.save_state(self.annotation_mgr.get_boxes())
         new_box = {
             'class': self.default_class,
             'conf': 1.0,
             **box_coords
         }
         idx = self.annotation_mgr.add_box(new_box)
+        self.state_mgr.push(InsertBox(idx, new_box))
         self.update_list_widget()
         self.draw_boxes()
         
@@ -1700,56 +1969,95 @@ class MainWindow(QMainWindow):
         if not self.original_pixmap:
             return
         
-        zoom = self.image_label.zoom_level
-        pan_x = self.image_label.pan_offset_x
-        pan_y = self.image_label.pan_offset_y
-        
-        base_scaled = self.original_pixmap.scaled(
-            self.image_label.size(), 
-            Qt.KeepAspectRatio, 
-            Qt.SmoothTransformation
-        )
-        zoomed_w = int(base_scaled.width() * zoom)
-        zoomed_h = int(base_scaled.height() * zoom)
-        zoomed_offset_x = (self.image_label.width() - zoomed_w) / 2
-        zoomed_offset_y = (self.image_label.height() - zoomed_h) / 2
-        
-        adj_offset_x = zoomed_offset_x + pan_x
-        adj_offset_y = zoomed_offset_y + pan_y
-        
-        real_x = (mouse_x - adj_offset_x) / zoom
-        real_y = (mouse_y - adj_offset_y) / zoom
-        
-        orig_w, orig_h = self.original_pixmap.width(), self.original_pixmap.height()
-        
-        selected_idx = -1
+        selected_idx = self.image_label.find_box_containing(mouse_x, mouse_y)
         boxes = self.annotation_mgr.get_boxes()
-        for i, box in enumerate(boxes):
-            rect = BoxGeometry.get_box_rect_px(
-                box, orig_w, orig_h, 
-                self.scale_factor_x, self.scale_factor_y
-            )
-            if rect and rect.contains(int(real_x), int(real_y)):
-                selected_idx = i
         
         self.annotation_mgr.select_box(selected_idx)
         
         if selected_idx != -1:
             self.selected_mask_index = -1
-            self.box_list.setCurrentRow(selected_idx)
+            self._sync_list_row(selected_idx)
             self.update_class_selector(boxes[selected_idx]['class'])
         self.draw_boxes()
     
+    def _format_row(self, pos, box):
+        return f"{pos+1}. {self.get_class_name(box['class'])}  ({box.get('conf', 1.0):.2f})"
+    
     def update_list_widget(self):
-        self.box_list.clear()
+        self._ensure_edit_panels()
         boxes = self.annotation_mgr.get_boxes()
         sorted_indices = self.annotation_mgr.get_sorted_indices()
+        items = [self._format_row(pos, boxes[i]) for pos, i in enumerate(sorted_indices)]
         
-        for pos, i in enumerate(sorted_indices):
-            box = boxes[i]
-            self.box_list.addItem(
-                f"{pos+1}. {self.get_class_name(box['class'])}  ({box.get('conf', 1.0):.2f})"
-            )
+        self.box_list.setUpdatesEnabled(False)
+        self.box_list.clear()
+        self.box_list.addItems(items)
+        self.box_list.setUpdatesEnabled(True)
+        self._list_stale = False
+    
+    def _list_row_of(self, box_idx):
+        """Row showing box_idx, or -1 if the list is out of step with the boxes."""
+        order = self.annotation_mgr.get_sorted_indices()
+        if self.box_list.count() != len(order):
+            return -1
+        return order.index(box_idx)
+    
+    def _refresh_list_row(self, box_idx):
+        """Re-render the single row of a box whose class changed."""
+        row = self._list_row_of(box_idx)
+        if row < 0:
+            self._list_stale = True
+            return
+        self.box_list.item(row).setText(self._format_row(row, self.annotation_mgr.boxes[box_idx]))
+    
+    def _remove_list_row(self, row):
+        """Drop a deleted box's row and renumber the rows after it."""
+        if row < 0 or self.box_list.count() != len(self.annotation_mgr.boxes) + 1:
+            self._list_stale = True
+            return
+        box_list = self.box_list
+        box_list.blockSignals(True)
+        box_list.setUpdatesEnabled(False)
+        box_list.takeItem(row)
+        box_list.setCurrentRow(-1)
+        boxes = self.annotation_mgr.boxes
+        order = self.annotation_mgr.get_sorted_indices()
+        for pos in range(row, len(order)):
+            box_list.item(pos).setText(self._format_row(pos, boxes[order[pos]]))
+        box_list.setUpdatesEnabled(True)
+        box_list.blockSignals(False)
+    
+    def _schedule_refresh(self, rebuild_list=True):
+        """
+        Repaint (and rebuild the box list if needed) once control returns
+        to the event loop, so a burst of edits (e.g. an autorepeating
+        hotkey) costs a single refresh.
+        """
+        if rebuild_list:
+            self._list_stale = True
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            QTimer.singleShot(0, self._do_refresh)
+    
+    def _do_refresh(self):
+        self._refresh_pending = False
+        if self._list_stale:
+            self.update_list_widget()
+        selected_idx = self.annotation_mgr.selected_index
+        if selected_idx >= 0:
+            self._sync_list_row(selected_idx)
+        self.draw_boxes()
+    
+    def _sync_list_row(self, row):
+        """
+        Move the list's current row without re-entering
+        list_selection_changed; callers update the selector and canvas
+        themselves.
+        """
+        if self.box_list.currentRow() != row:
+            self.box_list.blockSignals(True)
+            self.box_list.setCurrentRow(row)
+            self.box_list.blockSignals(False)
     
     def list_selection_changed(self, row):
         boxes = self.annotation_mgr.get_boxes()
@@ -1772,55 +2080,56 @@ class MainWindow(QMainWindow):
             self.spin_class.setValue(class_id)
             self.spin_class.blockSignals(False)
     
-    def update_current_box_class(self, index):
+    @contextmanager
+    def _edit(self, change=None, rebuild_list=True):
+        """
+        Wrap a box edit: record its undo change once the body has applied
+        it, then schedule the coalesced list/canvas refresh.
+        """
+        yield
+        if change is not None:
+            self.state_mgr.push(change)
+        self._schedule_refresh(rebuild_list)
+    
+    def _set_selected_box_class(self, new_class):
         selected_idx = self.annotation_mgr.selected_index
-        if selected_idx >= 0 and self.class_names:
-            self.state_mgr.save_state(self.annotation_mgr.get_boxes())
-            new_class = self.combo_class.itemData(index)
+        old_class = self.annotation_mgr.boxes[selected_idx]['class']
+        if new_class == old_class:
+            return
+        with self._edit(UpdateClass(selected_idx, old_class, new_class), rebuild_list=False):
             self.annotation_mgr.update_box_class(selected_idx, new_class)
-            self.update_list_widget()
-            self.box_list.setCurrentRow(selected_idx)
-            self.draw_boxes()
+            self._refresh_list_row(selected_idx)
+    
+    def update_current_box_class(self, index):
+        if self.annotation_mgr.selected_index >= 0 and self.class_names:
+            self._set_selected_box_class(self.combo_class.itemData(index))
     
     def update_current_box_class_spin(self):
-        selected_idx = self.annotation_mgr.selected_index
-        if selected_idx >= 0 and not self.class_names:
-            self.state_mgr.save_state(self.annotation_mgr.get_boxes())
-            self.annotation_mgr.update_box_class(selected_idx, self.spin_class.value())
-            self.update_list_widget()
-            self.box_list.setCurrentRow(selected_idx)
-            self.draw_boxes()
+        if self.annotation_mgr.selected_index >= 0 and not self.class_names:
+            self._set_selected_box_class(self.spin_class.value())
     
     def delete_current_box(self):
         selected_idx = self.annotation_mgr.selected_index
         if selected_idx >= 0:
-            self.state_mgr.save_state(self.annotation_mgr.get_boxes())
-            self.annotation_mgr.delete_box(selected_idx)
-            self.update_list_widget()
-            self.draw_boxes()
+            row = self._list_row_of(selected_idx)
+            with self._edit(DeleteBox(selected_idx, self.annotation_mgr.boxes[selected_idx]), rebuild_list=False):
+                self.annotation_mgr.delete_box(selected_idx)
+                self._remove_list_row(row)
     
     def sort_boxes_left_to_right(self):
-        boxes = self.annotation_mgr.get_boxes()
-        if not boxes:
+        if not self.annotation_mgr.boxes:
             return
-        self.state_mgr.save_state(boxes)
-        self.annotation_mgr.sort_boxes_by_x()
-        self.update_list_widget()
-        self.draw_boxes()
+        # The list already shows boxes left to right, so its rows are unchanged
+        with self._edit(rebuild_list=False):
+            self.state_mgr.push(SortPerm(self.annotation_mgr.sort_boxes_by_x()))
     
     def undo(self):
-        boxes = self.annotation_mgr.get_boxes()
-        prev_state = self.state_mgr.undo(boxes)
-        if prev_state is not None:
-            self.annotation_mgr.set_boxes(prev_state)
+        if self.state_mgr.undo(self.annotation_mgr):
             self.update_list_widget()
             self.draw_boxes()
     
     def redo(self):
-        boxes = self.annotation_mgr.get_boxes()
-        next_state = self.state_mgr.redo(boxes)
-        if next_state is not None:
-            self.annotation_mgr.set_boxes(next_state)
+        if self.state_mgr.redo(self.annotation_mgr):
             self.update_list_widget()
             self.draw_boxes()
     
@@ -1835,18 +2144,60 @@ class MainWindow(QMainWindow):
             self.mask_rectangles = []
             self.update_mask_list()
         
-        txt_path = os.path.splitext(self.current_image_path)[0] + ".txt"
-        boxes = self.annotation_mgr.get_boxes()
-        self.file_mgr.save_annotations(txt_path, boxes)
-        
-        self.lbl_info.setText("Saved" + (" (masks applied)" if masks_applied else ""))
-        self.update_progress()
-        QApplication.processEvents()
+        if self._inference_pending():
+            # Saving now would write an empty label file in place of the
+            # predictions; leave the image unannotated instead
+            self.lbl_info.setText("Detections still running - not saved")
+            self.lbl_info.setStyleSheet(STATUS_ERROR_STYLE)
+        else:
+            txt_path = self._current_txt_path
+            stem = self._current_stem
+            annotated = self._get_annotated()
+            payload = self.file_mgr.format_annotations(self.annotation_mgr.boxes)
+            # Skip the write when this exact content is already on disk
+            if stem not in annotated or self._saved_payloads.get(txt_path) != payload:
+                self._queue_save(txt_path, payload)
+                self._saved_payloads[txt_path] = payload
+                annotated.add(stem)
+            
+            self.lbl_info.setText("Saved" + (" (masks applied)" if masks_applied else ""))
+            self.update_progress()
         
         if go_next and self.current_index < len(self.image_list) - 1:
             self.current_index += 1
             self.load_image()
     
+    def _queue_save(self, txt_path, payload):
+        """Write payload to txt_path on the save thread."""
+        with self._pending_saves_lock:
+            queued = txt_path in self._pending_saves
+            self._pending_saves[txt_path] = payload
+        if not queued:
+            self._save_pool.start(SaveTask(
+                self.file_mgr, txt_path, self._pending_saves,
+                self._pending_saves_lock, self._save_signals
+            ))
+    
+    def _flush_saves(self, txt_path=None):
+        """Block until queued writes (or just those for txt_path) are on disk."""
+        if txt_path is not None:
+            with self._pending_saves_lock:
+                if txt_path not in self._pending_saves:
+                    return
+        self._save_pool.waitForDone()
+    
+    def _on_save_failed(self, txt_path, payload, error):
+        # Let the next save of this image retry the write
+        self._saved_payloads.pop(txt_path, None)
+        with self._pending_saves_lock:
+            if self._pending_saves.get(txt_path) == payload:
+                del self._pending_saves[txt_path]
+        QMessageBox.critical(self, "Error", f"Could not save {os.path.basename(txt_path)}:\n{error}")
+    
+    def closeEvent(self, event):
+        self._flush_saves()
+        super().closeEvent(event)
+    
     def next_image(self):
         self.save_annotation(go_next=False)
         if self.current_index < len(self.image_list) - 1:
@@ -1864,19 +2215,19 @@ class MainWindow(QMainWindow):
             self.load_image()
     
     def find_first_unannotated(self):
-        for i, img in enumerate(self.image_list):
-            if not self.file_mgr.annotation_exists(self.image_folder, img):
-                return i
-        return -1
+        annotated = self._get_annotated()
+        return next(
+            (i for i, stem in enumerate(self._image_stems) if stem not in annotated),
+            -1
+        )
     
     def find_next_unannotated(self, start_from=None):
         start = start_from if start_from is not None else self.current_index + 1
         
-        for i in range(start, len(self.image_list)):
-            if not self.file_mgr.annotation_exists(self.image_folder, self.image_list[i]):
-                return i
-        for i in range(0, start):
-            if not self.file_mgr.annotation_exists(self.image_folder, self.image_list[i]):
+        annotated = self._get_annotated()
+        stems = self._image_stems
+        for i in chain(range(start, len(stems)), range(0, start)):
+            if stems[i] not in annotated:
                 return i
         return -1
     
@@ -1894,101 +2245,112 @@ class MainWindow(QMainWindow):
         if not self.current_image_path or not self.image_list:
             return
         
-        reply = QMessageBox.question(
-            self, "Confirm Delete",
-            f"Delete {os.path.basename(self.current_image_path)}?",
-            QMessageBox.Yes | QMessageBox.No, QMessageBox.No
-        )
-        
-        if reply == QMessageBox.Yes:
-            try:
-                img_path = self.current_image_path
-                txt_path = os.path.splitext(img_path)[0] + ".txt"
-                filename = os.path.basename(img_path)
-                
-                if os.path.exists(img_path):
-                    os.remove(img_path)
-                if os.path.exists(txt_path):
-                    os.remove(txt_path)
-                
+        # Confirm with a second press instead of a modal dialog, so a
+        # cleanup pass does not spin a nested event loop per image
+        now = time.monotonic()
+        path = self.current_image_path
+        if path != self._delete_confirm_path or now > self._delete_confirm_deadline:
+            deadline = now + self._DELETE_CONFIRM_SECS
+            self._delete_confirm_path = path
+            self._delete_confirm_deadline = deadline
+            status = (self.lbl_info.text(), self.lbl_info.styleSheet())
+            self.lbl_info.setText(f"Press X again to delete {self._current_basename}")
+            self.lbl_info.setStyleSheet(STATUS_ERROR_STYLE)
+            QTimer.singleShot(
+                int(self._DELETE_CONFIRM_SECS * 1000),
+                lambda: self._expire_delete_confirm(path, deadline, status)
+            )
+            return
+        self._delete_confirm_path = None
+        self._perform_delete_current_image()
+    
+    def _expire_delete_confirm(self, path, deadline, status):
+        """Put back the status text once an unanswered delete prompt lapses."""
+        if self._delete_confirm_path != path or self._delete_confirm_deadline != deadline:
+            # Confirmed, re-armed, or the image changed meanwhile
+            return
+        self._delete_confirm_path = None
+        text, style = status
+        self.lbl_info.setText(text)
+        self.lbl_info.setStyleSheet(style)
+    
+    def _perform_delete_current_image(self):
+        try:
+            img_path = self.current_image_path
+            txt_path = self._current_txt_path
+            filename = self._current_basename
+            # A queued write must not recreate the .txt after it is removed
+            self._flush_saves(txt_path)
+            
+            for path in (img_path, txt_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._forget_cached_image(img_path)
+            self._get_annotated().discard(self._current_stem)
+            self._saved_payloads.pop(txt_path, None)
+            
+            # The current image sits at current_index; avoid a linear search
+            if self.image_list[self.current_index] == filename:
+                del self.image_list[self.current_index]
+                del self._image_stems[self.current_index]
+                del self._txt_paths[self.current_index]
+            else:
                 self.image_list.remove(filename)
-                
-                if not self.image_list:
-                    self.current_image_path = ""
-                    self.annotation_mgr.clear()
-                    self.image_label.setText("No images")
-                    return
-                
-                if self.current_index >= len(self.image_list):
-                    self.current_index = len(self.image_list) - 1
-                
-                self.progress_bar.setMaximum(len(self.image_list))
-                self.update_progress()
-                self.load_image()
-            except Exception as e:
-                QMessageBox.critical(self, "Error", str(e))
+                self._index_image_list()
+            
+            if not self.image_list:
+                self.current_image_path = ""
+                self.original_pixmap = None
+                self.annotation_mgr.clear()
+                self.image_label.setText("No images")
+                return
+            
+            if self.current_index >= len(self.image_list):
+                self.current_index = len(self.image_list) - 1
+            
+            self.progress_bar.setMaximum(len(self.image_list))
+            self.update_progress()
+            self.load_image()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", str(e))
+    
+    def _handle_escape(self):
+        if self.draw_mode:
+            self.toggle_draw_mode()
+        elif self.mask_mode:
+            self.toggle_mask_mode()
+        else:
+            self.annotation_mgr.deselect()
+            self.selected_mask_index = -1
+            self.draw_boxes()
+    
+    def _handle_delete_key(self):
+        if self.selected_mask_index >= 0:
+            self.delete_selected_mask()
+        else:
+            self.delete_current_box()
+    
+    def _apply_class_hotkey(self, new_class):
+        """Set the selected box's class from a digit key (1-9 -> 0-8, 0 -> 9)."""
+        if self.annotation_mgr.selected_index < 0:
+            return
+        self._set_selected_box_class(new_class)
+        self.update_class_selector(new_class)
     
     def keyPressEvent(self, event):
+        key = event.key()
         if event.modifiers() == Qt.ControlModifier:
-            if event.key() == Qt.Key_Z:
-                self.undo()
-                return
-            elif event.key() == Qt.Key_Y:
-                self.redo()
-                return
-            elif event.key() == Qt.Key_S:
-                self.save_annotation()
+            handler = self._ctrl_key_table.get(key)
+            if handler is not None:
+                handler()
                 return
         
-        key = event.key()
-        if key == Qt.Key_D:
-            self.next_image()
-        elif key == Qt.Key_A:
-            self.prev_image()
-        elif key == Qt.Key_S:
-            self.save_annotation()
-        elif key == Qt.Key_W:
-            self.toggle_draw_mode()
-        elif key == Qt.Key_M:
-            self.toggle_mask_mode()
-        elif key == Qt.Key_R:
-            self.reset_view()
-        elif key == Qt.Key_Q:
-            self.skip_image()
-        elif key == Qt.Key_N:
-            self.goto_next_unannotated()
-        elif key == Qt.Key_X:
-            self.delete_current_image()
-        elif key == Qt.Key_Escape:
-            if self.draw_mode:
-                self.toggle_draw_mode()
-            elif self.mask_mode:
-                self.toggle_mask_mode()
-            else:
-                self.annotation_mgr.deselect()
-                self.selected_mask_index = -1
-                self.draw_boxes()
-        elif key == Qt.Key_Delete:
-            if self.selected_mask_index >= 0:
-                self.delete_selected_mask()
-            else:
-                self.delete_current_box()
-        elif Qt.Key_1 <= key <= Qt.Key_9:
-            selected_idx = self.annotation_mgr.selected_index
-            if selected_idx >= 0:
-                self.state_mgr.save_state(self.annotation_mgr.get_boxes())
-                new_class = key - Qt.Key_1
-                self.annotation_mgr.update_box_class(selected_idx, new_class)
-                self.update_class_selector(new_class)
-                self.update_list_widget()
-                self.box_list.setCurrentRow(selected_idx)
-                self.draw_boxes()
-        elif key == Qt.Key_0:
-            selected_idx = self.annotation_mgr.selected_index
-            if selected_idx >= 0:
-                self.state_mgr.save_state(self.annotation_mgr.get_boxes())
-                self.annotation_mgr.update_box_class(selected_idx, 9)
-                self.update_class_selector(9)
-                self.update_list_widget()
-                self.box_list.setCurrentRow(selected_idx)
-                self.draw_boxes()
+        handler = self._key_table.get(key)
+        if handler is not None:
+            handler()
+        else:
+            new_class = self._digit_classes.get(key)
+            if new_class is not None:
+                self._apply_class_hotkey(new_class)
@@ -0,0 +1,106 @@
+"""Background workers that keep slow work off the GUI thread."""
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+from PyQt5.QtGui import QImage
+
+
+class InferenceSignals(QObject):
+    """Signals emitted by InferenceTask (delivered on the GUI thread)."""
+    
+    # generation, image path, detections
+    finished = pyqtSignal(int, str, list)
+
+
+class InferenceTask(QRunnable):
+    """Runs model inference for one image in a thread pool."""
+    
+    def __init__(self, model_mgr, image_path, confidence, generation):
+        super().__init__()
+        self.model_mgr = model_mgr
+        self.image_path = image_path
+        self.confidence = confidence
+        self.generation = generation
+        self.signals = InferenceSignals()
+    
+    def run(self):
+        try:
+            detections = self.model_mgr.run_inference(self.image_path, self.confidence)
+        except Exception as e:
+            print(f"Inference error: {e}")
+            detections = []
+        self.signals.finished.emit(self.generation, self.image_path, detections)
+
+
+class PrefetchSignals(QObject):
+    """Signals emitted by PrefetchTask (delivered on the GUI thread)."""
+    
+    # image path, decoded image
+    loaded = pyqtSignal(str, QImage)
+
+
+class PrefetchTask(QRunnable):
+    """
+    Decodes an image file into a QImage off the GUI thread.
+    
+    A null QImage is emitted when the file cannot be decoded.
+    """
+    
+    def __init__(self, image_path):
+        super().__init__()
+        self.image_path = image_path
+        self.signals = PrefetchSignals()
+    
+    def run(self):
+        # QImage is safe to create off the GUI thread; QPixmap is not
+        image = QImage(self.image_path)
+        self.signals.loaded.emit(self.image_path, image)
+
+
+class SaveSignals(QObject):
+    """Signals emitted by SaveTask (delivered on the GUI thread)."""
+    
+    # annotation path, payload that failed, error message
+    failed = pyqtSignal(str, str, str)
+
+
+class SaveTask(QRunnable):
+    """
+    Writes the newest queued payload for one annotation file.
+    
+    Payloads are queued in a shared dict keyed by path, so several saves
+    of the same file before the task runs collapse into one write.
+    """
+    
+    def __init__(self, file_mgr, txt_path, pending, lock, signals):
+        super().__init__()
+        self.file_mgr = file_mgr
+        self.txt_path = txt_path
+        self.pending = pending
+        self.lock = lock
+        self.signals = signals
+    
+    def run(self):
+        # The path stays in the queue until its newest payload is on disk,
+        # so the GUI thread can tell when a file is still being written
+        while True:
+            with self.lock:
+                payload = self.pending.get(self.txt_path)
+            if payload is None:
+                return
+            try:
+                self.file_mgr.save_annotations(self.txt_path, [], payload)
+            except OSError as e:
+                with self.lock:
+                    superseded = self.pending.get(self.txt_path) is not payload
+                    if not superseded:
+                        del self.pending[self.txt_path]
+                if superseded:
+                    # A newer payload was queued meanwhile; no other task
+                    # will pick it up, so retry with that one
+                    continue
+                self.signals.failed.emit(self.txt_path, payload, str(e))
+                return
+            with self.lock:
+                if self.pending.get(self.txt_path) is payload:
+                    del self.pending[self.txt_path]
+                    return
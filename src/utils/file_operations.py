@@ -1,8 +1,10 @@
 """File operations utilities."""
 
 import os
+import warnings
+import numpy as np
 import yaml
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set, Tuple
 
 
 class FileManager:
@@ -41,20 +43,88 @@ class FileManager:
         return boxes
     
     @staticmethod
-    def save_annotations(txt_path: str, boxes: List[Dict]) -> None:
+    def format_annotations(boxes: List[Dict]) -> str:
+        """
+        Serialize boxes to the YOLO text format.
+        
+        Args:
+            boxes: List of box dictionaries
+            
+        Returns:
+            File contents, one line per box
+        """
+        return "".join(
+            f"{box['class']} {box['x']:.6f} {box['y']:.6f} "
+            f"{box['w']:.6f} {box['h']:.6f}\n"
+            for box in boxes
+        )
+    
+    @staticmethod
+    def load_annotation_classes(txt_path: str) -> np.ndarray:
+        """
+        Load only the class column of a YOLO format text file.
+        
+        Parsed in C by numpy.loadtxt, for callers such as statistics that
+        need class counts but not box geometry. Counts the same boxes as
+        load_annotations: rows with fewer than five fields are not boxes.
+        
+        Args:
+            txt_path: Path to annotation file
+            
+        Returns:
+            1-D integer array with one class ID per box
+        """
+        no_boxes = np.empty(0, dtype=np.int64)
+        try:
+            with warnings.catch_warnings():
+                # Empty files are valid (image with no boxes)
+                warnings.simplefilter('ignore', UserWarning)
+                rows = np.loadtxt(txt_path, dtype=np.float64, ndmin=2)
+        except OSError:
+            # Removed or unreadable since the folder was scanned
+            return no_boxes
+        except ValueError:
+            # Ragged rows (e.g. some with a confidence column)
+            rows = None
+        
+        if rows is not None:
+            if rows.size == 0:
+                return no_boxes
+            if rows.shape[1] >= 5:
+                return rows[:, 0].astype(np.int64)
+        
+        # Irregular or short rows; fall back to the tolerant line parser
+        try:
+            boxes = FileManager.load_annotations(txt_path)
+        except OSError:
+            return no_boxes
+        return np.fromiter((b['class'] for b in boxes), dtype=np.int64, count=len(boxes))
+    
+    @staticmethod
+    def save_annotations(txt_path: str, boxes: List[Dict], payload: Optional[str] = None) -> None:
         """
         Save annotations to YOLO format text file.
         
         Args:
             txt_path: Path to save annotation file
             boxes: List of box dictionaries
+            payload: Pre-formatted contents, if the caller already has them
         """
-        with open(txt_path, 'w', encoding='utf-8') as f:
-            for box in boxes:
-                f.write(
-                    f"{box['class']} {box['x']:.6f} {box['y']:.6f} "
-                    f"{box['w']:.6f} {box['h']:.6f}\n"
-                )
+        if payload is None:
+            payload = FileManager.format_annotations(boxes)
+        # One buffered write to a sibling file, then an atomic rename, so a
+        # crash mid-save never leaves a truncated annotation behind
+        tmp_path = txt_path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8', buffering=65536) as f:
+                f.write(payload)
+            os.replace(tmp_path, txt_path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
     
     @staticmethod
     def load_class_names(file_path: str) -> Dict[int, str]:
@@ -132,10 +202,56 @@ class FileManager:
         if not os.path.exists(folder_path):
             return []
         
-        return sorted([
-            f for f in os.listdir(folder_path) 
-            if os.path.splitext(f)[1].lower() in extensions
-        ])
+        exts = tuple(ext.lower() for ext in extensions)
+        with os.scandir(folder_path) as entries:
+            # is_file() uses the cached dirent type, so no per-file stat
+            return sorted(
+                entry.name for entry in entries
+                if entry.name.lower().endswith(exts) and entry.is_file()
+            )
+    
+    @staticmethod
+    def existing_annotation_stems(folder_path: str) -> Set[str]:
+        """
+        Get the stems of all annotation files in a folder with one scan.
+        
+        Args:
+            folder_path: Path to image folder
+            
+        Returns:
+            Set of filenames (without extension) that have a .txt file
+        """
+        if not os.path.isdir(folder_path):
+            return set()
+        
+        with os.scandir(folder_path) as entries:
+            return {
+                entry.name[:-4] for entry in entries
+                if entry.name.endswith('.txt')
+            }
+    
+    @staticmethod
+    def annotation_file_stats(folder_path: str) -> Dict[str, Tuple[int, int]]:
+        """
+        Get modification time and size of every annotation file with one scan.
+        
+        Args:
+            folder_path: Path to image folder
+            
+        Returns:
+            Dictionary mapping filename (without extension) to
+            (st_mtime_ns, st_size) of its .txt file
+        """
+        if not os.path.isdir(folder_path):
+            return {}
+        
+        stats = {}
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                if entry.name.endswith('.txt') and entry.is_file():
+                    st = entry.stat()
+                    stats[entry.name[:-4]] = (st.st_mtime_ns, st.st_size)
+        return stats
     
     @staticmethod
     def annotation_exists(image_folder: str, image_name: str) -> bool: